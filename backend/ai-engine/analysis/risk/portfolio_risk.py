@@ -1,11 +1,16 @@
+import hashlib
 import numpy as np
 import pandas as pd
+from collections import OrderedDict
 
 class PortfolioRiskAnalyzer:
     """Analyze portfolio-level risk"""
     
-    def __init__(self):
+    def __init__(self, correlation_cache: "CorrelationCache" = None, interval: str = "5m"):
         self.positions = {}
+        # Shared by default so the engine's bar-close notifications reach it
+        self.correlation_cache = correlation_cache if correlation_cache is not None else default_correlation_cache
+        self.interval = interval
     
     def add_position(self, symbol: str, weight: float, returns: np.ndarray):
         """Add a position to portfolio"""
@@ -14,29 +19,44 @@ class PortfolioRiskAnalyzer:
             "returns": returns
         }
     
-    def calculate_portfolio_risk(self):
-        """Calculate portfolio risk metrics"""
+    def calculate_portfolio_risk(self, correlation_top_k: int = None, window: int = None):
+        """Calculate portfolio risk metrics
+        
+        With correlation_top_k set, only each symbol's k most correlated
+        neighbours are returned instead of the full correlation matrix. The
+        matrix over the last `window` returns (default: all) comes from the
+        correlation cache, so it is computed once per closed bar.
+        """
         if not self.positions:
             return {}
         
         symbols = list(self.positions.keys())
         weights = np.array([self.positions[s]["weight"] for s in symbols])
         
-        # Calculate correlation matrix (simplified)
         returns_matrix = np.column_stack([self.positions[s]["returns"] for s in symbols])
-        corr_matrix = np.corrcoef(returns_matrix.T)
+        corr_matrix = self.correlation_cache.get_or_compute(
+            symbols, returns_matrix, window or len(returns_matrix), self.interval
+        )
         
         # Calculate portfolio variance
         cov_matrix = np.cov(returns_matrix.T)
         portfolio_variance = np.dot(weights.T, np.dot(cov_matrix, weights))
         portfolio_std = np.sqrt(portfolio_variance)
         
-        return {
+        result = {
             "portfolio_std": portfolio_std,
             "portfolio_variance": portfolio_variance,
-            "correlation_matrix": corr_matrix.tolist(),
             "sharpe_ratio": self.calculate_sharpe_ratio(returns_matrix.mean(axis=0), portfolio_std)
         }
+        
+        if correlation_top_k is None:
+            result["correlation_matrix"] = corr_matrix.tolist()
+        else:
+            result["correlated_neighbors"] = CorrelationCache.top_k_neighbors(
+                symbols, corr_matrix, correlation_top_k
+            )
+        
+        return result
     
     def calculate_sharpe_ratio(self, returns: np.ndarray, std_dev: float, 
                               risk_free_rate: float = 0.02) -> float:
@@ -44,4 +64,113 @@ class PortfolioRiskAnalyzer:
         if std_dev == 0:
             return 0
         excess_returns = returns.mean() - risk_free_rate
-        return excess_returns / std_dev
\ No newline at end of file
+        return excess_returns / std_dev
+
+
+class CorrelationCache:
+    """Cache correlation matrices per (universe, window, interval, data)
+    
+    Keys carry a fingerprint of the returns window, so different data over
+    the same symbols never shares an entry. Entries are also tagged with the
+    close time of the last bar and dropped once a newer bar has closed for
+    that interval, which keeps superseded windows from piling up.
+    """
+    
+    def __init__(self, max_entries: int = 16, dtype=np.float64):
+        self.max_entries = max_entries
+        self.dtype = dtype
+        self._entries = OrderedDict()
+        self._last_bar = {}
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def fingerprint(recent: np.ndarray) -> bytes:
+        """Digest of a returns window (shape, dtype and values)"""
+        recent = np.ascontiguousarray(recent)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((recent.shape, recent.dtype.str)).encode())
+        digest.update(recent.tobytes())
+        return digest.digest()
+    
+    @classmethod
+    def make_key(cls, symbols, recent: np.ndarray, window: int, interval: str) -> tuple:
+        """Build a cache key for a universe of symbols and its returns window"""
+        return (tuple(symbols), window, interval, cls.fingerprint(recent))
+    
+    def on_bar_close(self, interval: str, bar_time):
+        """Record a newly closed bar; entries from older bars are dropped"""
+        self._last_bar[interval] = bar_time
+        for key in [k for k, (bar, _) in self._entries.items()
+                    if k[2] == interval and bar != bar_time]:
+            del self._entries[key]
+    
+    def get(self, symbols, returns_matrix: np.ndarray, window: int, interval: str):
+        """Return a cached matrix or None"""
+        recent = np.asarray(returns_matrix)[-window:]
+        return self._get(self.make_key(symbols, recent, window, interval))
+    
+    def _get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def get_or_compute(self, symbols, returns_matrix: np.ndarray, window: int,
+                       interval: str) -> np.ndarray:
+        """Return the correlation matrix of the last `window` rows, computing it once per data window"""
+        recent = np.asarray(returns_matrix)[-window:]
+        key = self.make_key(symbols, recent, window, interval)
+        corr = self._get(key)
+        if corr is not None:
+            return corr
+        
+        corr = np.corrcoef(recent, rowvar=False).astype(self.dtype, copy=False)
+        
+        self._entries[key] = (self._last_bar.get(interval), corr)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        
+        return corr
+    
+    def clear(self):
+        """Drop all cached matrices"""
+        self._entries.clear()
+    
+    @staticmethod
+    def top_k_arrays(corr: np.ndarray, k: int = 5, absolute: bool = False) -> tuple:
+        """Indices and values of each row's k most correlated other symbols"""
+        n = corr.shape[0]
+        k = max(0, min(k, n - 1))
+        if k == 0:
+            return np.empty((n, 0), dtype=np.int64), np.empty((n, 0), dtype=corr.dtype)
+        
+        scores = np.abs(corr) if absolute else np.array(corr, copy=True)
+        scores = np.nan_to_num(scores, nan=-np.inf)
+        np.fill_diagonal(scores, -np.inf)
+        
+        # argpartition per row is O(n), then only the k winners get sorted
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+        return idx, np.take_along_axis(corr, idx, axis=1)
+    
+    @staticmethod
+    def top_k_neighbors(symbols, corr: np.ndarray, k: int = 5,
+                        absolute: bool = False) -> dict:
+        """Sparse view: symbol -> [(neighbour, correlation), ...]"""
+        idx, values = CorrelationCache.top_k_arrays(corr, k, absolute)
+        symbols = list(symbols)
+        return {
+            symbol: [(symbols[j], float(v)) for j, v in zip(idx[i], values[i])]
+            for i, symbol in enumerate(symbols)
+        }
+
+
+# Process-wide cache; the engine calls on_bar_close as each bar is stored
+default_correlation_cache = CorrelationCache()
@@ -0,0 +1,150 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql import func
+
+from analysis.risk.stress_test import StressTester
+from config.constants import CRYPTO_ASSETS
+from config.settings import RISK_FREE_RATE, RISK_LOOKBACK_DAYS
+from models.risk_snapshot import PortfolioRiskSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioRiskBatch:
+    """Nightly risk snapshot for every user's portfolio"""
+    
+    def __init__(self, engine, lookback_days: int = RISK_LOOKBACK_DAYS,
+                 risk_free_rate: float = RISK_FREE_RATE, periods_per_year: int = 365,
+                 min_history: int = 20):
+        self.engine = engine
+        self.lookback_days = lookback_days
+        self.risk_free_rate = risk_free_rate
+        self.periods_per_year = periods_per_year  # crypto trades every day
+        self.min_history = min_history  # returns a portfolio needs before it gets metrics
+    
+    def load_returns(self, assets) -> pd.DataFrame:
+        """Download daily closes for all assets in one call; returns (dates x assets)"""
+        crypto = set(CRYPTO_ASSETS)
+        tickers = {f"{a}-USD" if a in crypto else a: a for a in assets}
+        if not tickers:
+            return pd.DataFrame()
+        
+        closes = yf.download(
+            list(tickers), period=f"{self.lookback_days}d", interval="1d",
+            progress=False, auto_adjust=True
+        )["Close"]
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(name=next(iter(tickers)))
+        
+        return closes.rename(columns=tickers).pct_change().iloc[1:]
+    
+    def compute(self, positions: dict, returns: pd.DataFrame) -> dict:
+        """Compute risk metrics for all users with matrix operations
+        
+        Missing history is never read as a zero return: a period only counts
+        for a user when every asset they hold has a return for it, and users
+        with fewer than `min_history` such periods are left out.
+        """
+        users, user_idx = np.unique(positions["user_id"], return_inverse=True)
+        assets, asset_idx = StressTester.asset_index(positions["symbol"])
+        
+        # (users x assets) holdings value and weights
+        values = np.zeros((len(users), len(assets)))
+        np.add.at(values, (user_idx, asset_idx), positions["quantity"] * positions["price"])
+        total_value = values.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weights = np.where(total_value[:, None] > 0, values / total_value[:, None], 0.0)
+        
+        R = returns.reindex(columns=assets).to_numpy(dtype=float)
+        missing = np.isnan(R)
+        
+        # (users x periods) portfolio return series, NaN where a held asset has no data
+        held = (values != 0).astype(float)
+        port_returns = weights @ np.where(missing, 0.0, R).T
+        port_returns[(held @ missing.T.astype(float)) > 0] = np.nan
+        observed = (~np.isnan(port_returns)).sum(axis=1)
+        
+        keep = observed >= max(self.min_history, 2)
+        if not keep.all():
+            logger.warning(f"Risk batch: skipping {int((~keep).sum())} users with insufficient return history")
+        users, weights, total_value = users[keep], weights[keep], total_value[keep]
+        port_returns, observed = port_returns[keep], observed[keep]
+        position_count = np.bincount(user_idx, minlength=len(keep))[keep]
+        
+        with np.errstate(invalid="ignore"):
+            std = np.nanstd(port_returns, axis=1, ddof=1) if len(users) else np.zeros(0)
+            mean = np.nanmean(port_returns, axis=1) if len(users) else np.zeros(0)
+        
+        ann_vol = std * np.sqrt(self.periods_per_year)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = np.where(
+                ann_vol > 0,
+                (mean * self.periods_per_year - self.risk_free_rate) / ann_vol,
+                0.0
+            )
+        
+        # Historical VaR, same order-statistic indexing as RiskScorer, over each
+        # user's own observed periods (sorting puts the NaNs last)
+        ordered = np.sort(port_returns, axis=1)
+        i95 = (0.05 * observed).astype(int)[:, None]
+        i99 = (0.01 * observed).astype(int)[:, None]
+        
+        return {
+            "user_id": users,
+            "total_value": total_value,
+            "position_count": position_count,
+            "volatility": ann_vol,
+            "var_95": np.abs(np.take_along_axis(ordered, i95, axis=1)[:, 0]),
+            "var_99": np.abs(np.take_along_axis(ordered, i99, axis=1)[:, 0]),
+            "sharpe_ratio": sharpe,
+            "concentration": (weights ** 2).sum(axis=1),
+            "max_weight": weights.max(axis=1) if len(assets) else np.zeros(len(users))
+        }
+    
+    def write_snapshots(self, metrics: dict, active_users=()) -> int:
+        """Upsert one snapshot per computed user in one transaction
+        
+        Users skipped for missing data keep their previous snapshot; only
+        users with no open positions (not in `active_users`) are removed.
+        """
+        table = PortfolioRiskSnapshot.__table__
+        columns = [c for c in metrics if c in table.c]
+        rows = [
+            dict(zip(columns, row))
+            for row in zip(*(metrics[c].tolist() for c in columns))
+        ]
+        
+        dialect = self.engine.dialect.name
+        with self.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.user_id.not_in([int(u) for u in active_users])))
+            if not rows:
+                return 0
+            if dialect in ("postgresql", "sqlite"):
+                stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table).values(rows)
+                updates = {c: stmt.excluded[c] for c in columns if c != "user_id"}
+                updates["computed_at"] = func.now()
+                conn.execute(stmt.on_conflict_do_update(index_elements=["user_id"], set_=updates))
+            else:
+                conn.execute(delete(table).where(table.c.user_id.in_([row["user_id"] for row in rows])))
+                conn.execute(insert(table), rows)
+        
+        return len(rows)
+    
+    def run(self) -> int:
+        """Load positions and histories in bulk, compute and persist snapshots"""
+        positions = StressTester.load_positions(self.engine)
+        if len(positions["user_id"]) == 0:
+            logger.info("Risk batch: no open positions")
+            return self.write_snapshots({})
+        
+        assets, _ = StressTester.asset_index(positions["symbol"])
+        returns = self.load_returns(assets)
+        count = self.write_snapshots(self.compute(positions, returns), np.unique(positions["user_id"]))
+        
+        logger.info(f"Risk batch: wrote {count} portfolio snapshots")
+        return count
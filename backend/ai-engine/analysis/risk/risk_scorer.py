@@ -31,12 +31,59 @@ class RiskScorer:
         else:
             return "HIGH"
     
+    @staticmethod
+    def calculate_position_risk_batch(confidence, volatility,
+                                      portfolio_percentage) -> np.ndarray:
+        """Calculate position risk scores (0-100) for many positions at once"""
+        confidence = np.asarray(confidence, dtype=np.float64)
+        volatility = np.asarray(volatility, dtype=np.float64)
+        portfolio_percentage = np.asarray(portfolio_percentage, dtype=np.float64)
+        
+        # Same formula and operation order as calculate_position_risk
+        confidence_risk = (100 - confidence) / 100
+        vol_risk = np.minimum(volatility * 10, 1)
+        size_risk = np.minimum(portfolio_percentage / 10, 1)
+        
+        total_risk = (confidence_risk * 0.4 + vol_risk * 0.3 + size_risk * 0.3) * 100
+        
+        return np.minimum(total_risk, 100)
+    
+    @staticmethod
+    def assess_risk_level_batch(risk_scores) -> np.ndarray:
+        """Convert an array of risk scores to risk levels"""
+        risk_scores = np.asarray(risk_scores, dtype=np.float64)
+        return np.where(
+            risk_scores < 30, "LOW",
+            np.where(risk_scores < 60, "MEDIUM", "HIGH")
+        )
+    
     @staticmethod
     def calculate_portfolio_var(returns: np.ndarray, confidence_level: float = 0.95) -> float:
         """Calculate Value at Risk (VaR)"""
         if len(returns) == 0:
             return 0
         
-        sorted_returns = np.sort(returns)
-        index = int((1 - confidence_level) * len(sorted_returns))
-        return abs(sorted_returns[index]) if index < len(sorted_returns) else 0
\ No newline at end of file
+        # Only the k-th order statistic is needed, so partition instead of sorting
+        returns = np.asarray(returns)
+        index = int((1 - confidence_level) * len(returns))
+        if index >= len(returns):
+            return 0
+        return abs(np.partition(returns, index)[index])
+    
+    @staticmethod
+    def calculate_portfolio_var_levels(returns: np.ndarray,
+                                       confidence_levels=(0.95, 0.99)) -> dict:
+        """Calculate VaR at several confidence levels with a single partition"""
+        returns = np.asarray(returns)
+        n = len(returns)
+        if n == 0:
+            return {level: 0 for level in confidence_levels}
+        
+        indices = {level: int((1 - level) * n) for level in confidence_levels}
+        valid = sorted({i for i in indices.values() if i < n})
+        partitioned = np.partition(returns, valid) if valid else returns
+        
+        return {
+            level: abs(partitioned[index]) if index < n else 0
+            for level, index in indices.items()
+        }
\ No newline at end of file
@@ -0,0 +1,59 @@
+from collections import deque
+
+from sortedcontainers import SortedList
+
+
+class RollingVaR:
+    """Historical VaR over a rolling window of returns"""
+    
+    def __init__(self, window: int = 250, confidence_levels=(0.95, 0.99)):
+        if window <= 0:
+            raise ValueError("window must be positive")
+        
+        self.window = window
+        self.confidence_levels = tuple(confidence_levels)
+        self._returns = deque()
+        # Window kept in sorted order so quantiles are O(log n) lookups
+        self._sorted = SortedList()
+    
+    def __len__(self):
+        return len(self._returns)
+    
+    def update(self, value: float):
+        """Add a new return, evicting the oldest once the window is full"""
+        if value != value:
+            return  # NaN cannot be ordered, skip it
+        
+        if len(self._returns) == self.window:
+            self._sorted.remove(self._returns.popleft())
+        
+        self._returns.append(value)
+        self._sorted.add(value)
+    
+    def extend(self, values):
+        """Add several returns in order"""
+        for value in values:
+            self.update(value)
+    
+    def quantile(self, confidence_level: float = 0.95) -> float:
+        """Return the loss quantile used for VaR (same indexing as RiskScorer)"""
+        n = len(self._sorted)
+        index = int((1 - confidence_level) * n)
+        if n == 0 or index >= n:
+            return 0
+        return self._sorted[index]
+    
+    def var(self, confidence_level: float = 0.95) -> float:
+        """Calculate Value at Risk for the current window"""
+        return abs(self.quantile(confidence_level))
+    
+    def var_levels(self, confidence_levels=None) -> dict:
+        """Calculate VaR at several confidence levels at once"""
+        if confidence_levels is None:
+            confidence_levels = self.confidence_levels
+        return {level: self.var(level) for level in confidence_levels}
+    
+    def reset(self):
+        """Clear the window"""
+        self._returns.clear()
+        self._sorted.clear()
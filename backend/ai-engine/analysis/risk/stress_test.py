@@ -0,0 +1,137 @@
+import numpy as np
+from sqlalchemy import text
+
+from config.constants import CRYPTO_ASSETS, STRESS_SCENARIOS
+
+# Core query: plain tuples straight into arrays, no ORM objects
+POSITIONS_QUERY = text(
+    "SELECT portfolios.user_id, positions.symbol, positions.quantity, "
+    "positions.current_price, positions.avg_price "
+    "FROM positions JOIN portfolios ON portfolios.id = positions.portfolio_id "
+    "WHERE positions.is_active = :active"
+)
+
+
+class StressTester:
+    """Apply named shock scenarios to every user's positions at once"""
+    
+    def __init__(self, scenarios: dict = None):
+        self.scenarios = scenarios if scenarios is not None else STRESS_SCENARIOS
+    
+    @staticmethod
+    def base_asset(symbol: str) -> str:
+        """Map 'BTC/USD', 'BTC-USD' or 'BTCUSDT' to 'BTC'"""
+        symbol = symbol.upper()
+        for sep in ("/", "-"):
+            if sep in symbol:
+                return symbol.split(sep)[0]
+        for quote in ("USDT", "USD"):
+            if symbol.endswith(quote) and len(symbol) > len(quote):
+                return symbol[:-len(quote)]
+        return symbol
+    
+    @staticmethod
+    def asset_index(symbols) -> tuple:
+        """Unique base assets and each symbol's index into them"""
+        symbols, symbol_idx = np.unique(np.asarray(symbols).astype(str), return_inverse=True)
+        bases = np.array([StressTester.base_asset(s) for s in symbols], dtype=str)
+        assets, base_idx = np.unique(bases, return_inverse=True)
+        return assets, base_idx[symbol_idx]
+    
+    @staticmethod
+    def load_positions(engine) -> dict:
+        """Load all active positions as column arrays"""
+        with engine.connect() as conn:
+            rows = conn.execute(POSITIONS_QUERY, {"active": True}).all()
+        
+        if not rows:
+            return {
+                "user_id": np.empty(0, dtype=np.int64),
+                "symbol": np.empty(0, dtype=object),
+                "quantity": np.empty(0),
+                "price": np.empty(0)
+            }
+        
+        user_id, symbol, quantity, current_price, avg_price = zip(*rows)
+        current_price = np.array(current_price, dtype=np.float64)
+        avg_price = np.array(avg_price, dtype=np.float64)
+        
+        # Fall back to entry price when no mark has been recorded yet
+        price = np.where(np.nan_to_num(current_price) > 0, current_price, avg_price)
+        
+        return {
+            "user_id": np.array(user_id, dtype=np.int64),
+            "symbol": np.array(symbol, dtype=object),
+            "quantity": np.array(quantity, dtype=np.float64),
+            "price": price
+        }
+    
+    def shock_matrix(self, assets, scenario_names) -> tuple:
+        """Build (scenarios x assets) return shocks and per-scenario FX moves"""
+        crypto = set(CRYPTO_ASSETS)
+        asset_class = ["crypto" if asset in crypto else "other" for asset in assets]
+        
+        shocks = np.zeros((len(scenario_names), len(assets)))
+        fx = np.zeros(len(scenario_names))
+        
+        for i, name in enumerate(scenario_names):
+            scenario = self.scenarios[name]
+            class_shocks = scenario.get("asset_class_shocks", {})
+            asset_shocks = scenario.get("shocks", {})
+            
+            # Asset-specific shocks take precedence over asset-class shocks
+            shocks[i] = [
+                asset_shocks.get(asset, class_shocks.get(cls, 0.0))
+                for asset, cls in zip(assets, asset_class)
+            ]
+            fx[i] = scenario.get("fx_shock", 0.0)
+        
+        return shocks, fx
+    
+    def run(self, positions: dict, scenario_names=None) -> dict:
+        """Run scenarios over all positions; values are in the positions' currency (SLL)"""
+        if scenario_names is None:
+            scenario_names = list(self.scenarios.keys())
+        
+        users, user_idx = np.unique(positions["user_id"], return_inverse=True)
+        assets, asset_idx = self.asset_index(positions["symbol"])
+        
+        values = positions["quantity"] * positions["price"]
+        user_exposure = np.bincount(user_idx, weights=values, minlength=len(users))
+        asset_exposure = np.bincount(asset_idx, weights=values, minlength=len(assets))
+        
+        shocks, fx = self.shock_matrix(assets, scenario_names)
+        
+        # Positions are quoted in USD and valued in SLL, so FX moves compound
+        # with the asset move: (1 + r)(1 + fx) - 1
+        position_returns = (1 + shocks[:, asset_idx]) * (1 + fx[:, None]) - 1
+        position_pnl = position_returns * values
+        
+        results = {}
+        for i, name in enumerate(scenario_names):
+            user_pnl = np.bincount(user_idx, weights=position_pnl[i], minlength=len(users))
+            asset_pnl = np.bincount(asset_idx, weights=position_pnl[i], minlength=len(assets))
+            
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pnl_percent = np.where(user_exposure != 0, user_pnl / user_exposure * 100, 0.0)
+            
+            results[name] = {
+                "user_pnl": user_pnl,
+                "user_pnl_percent": pnl_percent,
+                "total_pnl": float(user_pnl.sum()),
+                "stressed_exposure": float(values.sum() + user_pnl.sum()),
+                "pnl_by_asset": dict(zip(assets.tolist(), asset_pnl.tolist())),
+                "worst_user_id": int(users[np.argmin(user_pnl)]) if len(users) else None
+            }
+        
+        return {
+            "user_ids": users,
+            "user_exposure": user_exposure,
+            "total_exposure": float(values.sum()),
+            "exposure_by_asset": dict(zip(assets.tolist(), asset_exposure.tolist())),
+            "scenarios": results
+        }
+    
+    def run_from_database(self, engine, scenario_names=None) -> dict:
+        """Load every active position in bulk and run the scenarios"""
+        return self.run(self.load_positions(engine), scenario_names)
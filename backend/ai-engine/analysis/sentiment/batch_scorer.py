@@ -0,0 +1,112 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from textblob import TextBlob
+
+
+def score_texts(texts: list) -> list:
+    """TextBlob polarity for a chunk of texts (runs inside worker processes)"""
+    return [TextBlob(text).sentiment.polarity for text in texts]
+
+
+class BatchSentimentScorer:
+    """Score large text batches in a process pool"""
+    
+    def __init__(self, workers: int = None, chunk_size: int = 256, min_parallel: int = 1000):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_parallel = min_parallel  # below this, pool overhead outweighs the gain
+        self._pool = None
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+    
+    def score(self, texts: list) -> list:
+        """Polarity for every text, in input order"""
+        if self.workers <= 1 or len(texts) < self.min_parallel:
+            return score_texts(texts)
+        
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        results = []
+        for chunk_scores in self._get_pool().map(score_texts, chunks):
+            results.extend(chunk_scores)
+        return results
+    
+    def close(self):
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def aggregate_by_symbol(symbols, polarities, published_at=None,
+                        half_life_hours: float = 6.0, now=None) -> dict:
+    """Per-symbol mean, positive/negative counts and recency-weighted sentiment"""
+    if len(symbols) == 0:
+        return {}
+    
+    polarities = np.asarray(polarities, dtype=np.float64)
+    names, idx = np.unique(np.asarray(symbols).astype(str), return_inverse=True)
+    counts = np.bincount(idx, minlength=len(names))
+    
+    mean = np.bincount(idx, weights=polarities, minlength=len(names)) / counts
+    positive = np.bincount(idx, weights=polarities > 0, minlength=len(names))
+    negative = np.bincount(idx, weights=polarities < 0, minlength=len(names))
+    
+    # Exponential decay by article age; undated articles get full weight
+    if published_at is not None:
+        published = pd.to_datetime(pd.Series(published_at), utc=True, errors="coerce")
+        now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+        age_hours = ((now - published).dt.total_seconds() / 3600).clip(lower=0)
+        weights = np.power(0.5, age_hours.fillna(0).to_numpy() / half_life_hours)
+    else:
+        weights = np.ones(len(polarities))
+    
+    weighted = (np.bincount(idx, weights=weights * polarities, minlength=len(names))
+                / np.bincount(idx, weights=weights, minlength=len(names)))
+    
+    return {
+        name: {
+            "sentiment": float(mean[i]),
+            "weighted_sentiment": float(weighted[i]),
+            "article_count": int(counts[i]),
+            "positive_articles": int(positive[i]),
+            "negative_articles": int(negative[i])
+        }
+        for i, name in enumerate(names.tolist())
+    }
+
+
+def benchmark(n_articles: int = 20000, worker_counts=(1, 2, 4, 8)) -> dict:
+    """Articles per second versus worker count on synthetic headlines"""
+    words = ["bitcoin", "surges", "crashes", "strong", "weak", "rally", "fear",
+             "record", "losses", "gains", "bullish", "bearish", "market", "terrible"]
+    rng = np.random.default_rng(0)
+    texts = [" ".join(rng.choice(words, 12)) + f" #{i}" for i in range(n_articles)]
+    
+    results = {}
+    for workers in worker_counts:
+        with BatchSentimentScorer(workers=workers, min_parallel=0) as scorer:
+            scorer.score(texts[:scorer.chunk_size * workers])  # start the workers
+            start = time.perf_counter()
+            scorer.score(texts)
+            elapsed = time.perf_counter() - start
+        results[workers] = n_articles / elapsed
+        print(f"workers={workers}: {results[workers]:,.0f} articles/s")
+    
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,45 +1,140 @@
+import asyncio
+
+import httpx
 import requests
 from textblob import TextBlob
 
+from analysis.sentiment.batch_scorer import BatchSentimentScorer, aggregate_by_symbol
+from analysis.sentiment.sentiment_cache import SentimentCache
+from config.settings import SENTIMENT_CACHE_PATH, SENTIMENT_CACHE_SIZE
+
 class NewsAnalyzer:
     """Analyze news sentiment"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url: str = "https://newsapi.org/v2",
+                 timeout: float = 10.0, max_concurrency: int = 10, max_retries: int = 2,
+                 sentiment_cache: SentimentCache = None, scoring_workers: int = None):
         self.api_key = api_key
-        self.base_url = "https://newsapi.org/v2"
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        if sentiment_cache is None:
+            sentiment_cache = SentimentCache(SENTIMENT_CACHE_SIZE, SENTIMENT_CACHE_PATH)
+        self.sentiment_cache = sentiment_cache
+        self.batch_scorer = BatchSentimentScorer(workers=scoring_workers)
+    
+    def _build_params(self, query: str, language: str) -> dict:
+        """Query parameters for the everything endpoint"""
+        return {
+            "q": query,
+            "apiKey": self.api_key,
+            "language": language,
+            "sortBy": "publishedAt",
+            "pageSize": 10
+        }
+    
+    @staticmethod
+    def score_text(text: str) -> float:
+        """TextBlob polarity for a single text"""
+        return TextBlob(text).sentiment.polarity
+    
+    def cache_stats(self) -> dict:
+        """Sentiment cache hit and miss counters"""
+        return self.sentiment_cache.stats()
+    
+    def _score_articles(self, articles: list) -> dict:
+        """Average TextBlob polarity over article titles and descriptions"""
+        texts = [f"{article.get('title', '')} {article.get('description', '')}"
+                 for article in articles]
+        sentiments = self.sentiment_cache.get_or_score_many(
+            [text for text in texts if text], self.score_text
+        )
+        
+        if sentiments:
+            avg_sentiment = sum(sentiments) / len(sentiments)
+            return {
+                "sentiment": avg_sentiment,
+                "article_count": len(articles),
+                "positive_articles": len([s for s in sentiments if s > 0]),
+                "negative_articles": len([s for s in sentiments if s < 0])
+            }
+        
+        return {"sentiment": 0, "article_count": 0}
+    
+    def score_article_batch(self, articles: list, half_life_hours: float = 6.0) -> dict:
+        """Score a large batch of articles in a process pool and aggregate per symbol
+        
+        Each article needs a 'symbol' key; 'publishedAt' drives the recency weighting.
+        """
+        if not articles:
+            return {}
+        
+        texts = [f"{article.get('title', '')} {article.get('description', '')}"
+                 for article in articles]
+        polarities = self.sentiment_cache.get_or_score_batch(texts, self.batch_scorer.score)
+        
+        return aggregate_by_symbol(
+            [article.get("symbol", "UNKNOWN") for article in articles],
+            polarities,
+            [article.get("publishedAt") for article in articles],
+            half_life_hours
+        )
     
     def get_news_sentiment(self, query: str, language="en"):
         """Get sentiment for news about a query"""
         try:
             url = f"{self.base_url}/everything"
-            params = {
-                "q": query,
-                "apiKey": self.api_key,
-                "language": language,
-                "sortBy": "publishedAt",
-                "pageSize": 10
-            }
+            params = self._build_params(query, language)
             
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=params, timeout=self.timeout)
             if response.status_code == 200:
-                articles = response.json().get("articles", [])
-                sentiments = []
-                
-                for article in articles:
-                    text = f"{article.get('title', '')} {article.get('description', '')}"
-                    if text:
-                        blob = TextBlob(text)
-                        sentiments.append(blob.sentiment.polarity)
-                
-                if sentiments:
-                    avg_sentiment = sum(sentiments) / len(sentiments)
-                    return {
-                        "sentiment": avg_sentiment,
-                        "article_count": len(articles),
-                        "positive_articles": len([s for s in sentiments if s > 0]),
-                        "negative_articles": len([s for s in sentiments if s < 0])
-                    }
+                return self._score_articles(response.json().get("articles", []))
         except Exception as e:
             print(f"News analysis error: {e}")
         
-        return {"sentiment": 0, "article_count": 0}
\ No newline at end of file
+        return {"sentiment": 0, "article_count": 0}
+    
+    async def _fetch_articles(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                              query: str, language: str) -> list:
+        """Fetch articles for one query, retrying timeouts, 429s and 5xx responses"""
+        params = self._build_params(query, language)
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    response = await client.get(f"{self.base_url}/everything", params=params)
+                
+                if response.status_code == 200:
+                    return response.json().get("articles", [])
+                if response.status_code != 429 and response.status_code < 500:
+                    return []
+            except (httpx.HTTPError, ValueError) as e:
+                if attempt == self.max_retries:
+                    print(f"News analysis error for {query}: {e}")
+                    return []
+            
+            if attempt < self.max_retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        
+        return []
+    
+    async def get_news_sentiment_batch_async(self, queries: list, language="en") -> dict:
+        """Fetch and score many queries concurrently over one pooled client"""
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            results = await asyncio.gather(*(
+                self._fetch_articles(client, semaphore, query, language)
+                for query in queries
+            ))
+        
+        return {query: self._score_articles(articles)
+                for query, articles in zip(queries, results)}
+    
+    def get_news_sentiment_batch(self, queries: list, language="en") -> dict:
+        """Blocking wrapper around get_news_sentiment_batch_async"""
+        return asyncio.run(self.get_news_sentiment_batch_async(queries, language))
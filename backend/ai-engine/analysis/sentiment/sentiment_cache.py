@@ -0,0 +1,118 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class SentimentCache:
+    """Two-tier sentiment cache keyed by a hash of the article text
+    
+    A bounded in-memory LRU sits in front of a SQLite file so each
+    article is scored once in its lifetime, across restarts.
+    """
+    
+    def __init__(self, max_size: int = 10000, path: str = None):
+        self.max_size = max_size
+        self.path = path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+        if path:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment (hash BLOB PRIMARY KEY, polarity REAL)"
+            )
+            self._db.commit()
+    
+    @staticmethod
+    def make_key(text: str) -> bytes:
+        """SHA-256 digest of the text"""
+        return hashlib.sha256(text.encode("utf-8")).digest()
+    
+    def _remember(self, key: bytes, polarity: float):
+        self._memory[key] = polarity
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+    
+    def _lookup(self, key: bytes):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._memory[key]
+        
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT polarity FROM sentiment WHERE hash = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                self._remember(key, row[0])
+                return row[0]
+        
+        self.misses += 1
+        return None
+    
+    def get(self, text: str):
+        """Cached polarity for a text, or None"""
+        with self._lock:
+            return self._lookup(self.make_key(text))
+    
+    def set_many(self, items):
+        """Store (text, polarity) pairs in both tiers with one disk commit"""
+        rows = [(self.make_key(text), polarity) for text, polarity in items]
+        with self._lock:
+            for key, polarity in rows:
+                self._remember(key, polarity)
+            if self._db is not None and rows:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO sentiment (hash, polarity) VALUES (?, ?)", rows
+                )
+                self._db.commit()
+    
+    def set(self, text: str, polarity: float):
+        """Store a polarity in both tiers"""
+        self.set_many([(text, polarity)])
+    
+    def get_or_score_many(self, texts, scorer) -> list:
+        """Polarity for each text, calling scorer only on cache misses"""
+        return self.get_or_score_batch(texts, lambda missing: [scorer(t) for t in missing])
+    
+    def get_or_score_batch(self, texts, batch_scorer) -> list:
+        """Like get_or_score_many, but scores all misses with one batch_scorer(list) call"""
+        with self._lock:
+            results = [self._lookup(self.make_key(text)) for text in texts]
+        
+        missing = list(dict.fromkeys(t for t, r in zip(texts, results) if r is None))
+        if missing:
+            scored = dict(zip(missing, batch_scorer(missing)))
+            self.set_many(scored.items())
+            results = [scored[t] if r is None else r for t, r in zip(texts, results)]
+        
+        return results
+    
+    def stats(self) -> dict:
+        """Hit and miss counters per tier"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0,
+            "memory_size": len(self._memory)
+        }
+    
+    def close(self):
+        """Close the disk tier"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
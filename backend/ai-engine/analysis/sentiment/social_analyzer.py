@@ -1,20 +1,352 @@
+import json
+import math
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+
+import pandas as pd
+
+from analysis.sentiment.batch_scorer import score_texts
+from analysis.sentiment.sentiment_cache import SentimentCache
+
+
+class PostSource(ABC):
+    """Pluggable source of social posts
+    
+    Posts are dicts with 'symbol' and 'text', plus optional 'timestamp'
+    (epoch seconds or ISO string), 'platform', 'subreddit' and 'upvote_ratio'.
+    """
+    
+    @abstractmethod
+    def read(self, max_items: int = 1000) -> list:
+        """Return up to max_items new posts without blocking"""
+
+
+class FilePostSource(PostSource):
+    """Tail a JSON-lines file, one post per line"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._offset = 0
+    
+    def read(self, max_items: int = 1000) -> list:
+        posts = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                f.seek(self._offset)
+                while len(posts) < max_items:
+                    line = f.readline()
+                    if not line or not line.endswith("\n"):
+                        break  # EOF or a partially written line
+                    self._offset = f.tell()
+                    if line.strip():
+                        posts.append(json.loads(line))
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            print(f"Social source parse error: {e}")
+        return posts
+
+
+class QueuePostSource(PostSource):
+    """In-process queue stand-in for a message broker"""
+    
+    def __init__(self, post_queue: queue.Queue = None):
+        self.queue = post_queue if post_queue is not None else queue.Queue()
+    
+    def put(self, post: dict):
+        self.queue.put(post)
+    
+    def read(self, max_items: int = 1000) -> list:
+        posts = []
+        while len(posts) < max_items:
+            try:
+                posts.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return posts
+
+
+class SlidingWindow:
+    """Running aggregates over the last `seconds` of posts, bounded in size"""
+    
+    def __init__(self, seconds: float, max_items: int):
+        self.seconds = seconds
+        self.max_items = max_items
+        self._items = deque()
+        self.total = 0.0
+        self.positive = 0
+        self.upvote_total = 0.0
+    
+    def _pop(self):
+        _, polarity, upvote = self._items.popleft()
+        self.total -= polarity
+        self.positive -= polarity > 0
+        self.upvote_total -= upvote
+    
+    def add(self, ts: float, polarity: float, upvote: float):
+        if len(self._items) == self.max_items:
+            self._pop()
+        self._items.append((ts, polarity, upvote))
+        self.total += polarity
+        self.positive += polarity > 0
+        self.upvote_total += upvote
+    
+    def evict(self, watermark: float):
+        while self._items and self._items[0][0] <= watermark - self.seconds:
+            self._pop()
+    
+    def __len__(self):
+        return len(self._items)
+
+
+class TumblingWindow:
+    """Fixed, non-overlapping buckets; keeps the current and last completed bucket"""
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.start = None
+        self.current = None
+        self.completed = None
+    
+    @staticmethod
+    def _empty() -> dict:
+        return {"total": 0.0, "count": 0, "positive": 0}
+    
+    def advance(self, ts: float):
+        """Close buckets that ended by `ts`, even if no post arrived since"""
+        start = ts - ts % self.seconds
+        if self.start is None:
+            self.start, self.current = start, self._empty()
+        elif start > self.start:
+            if start - self.start <= self.seconds:
+                self.completed = dict(self.current, window_start=self.start)
+            else:
+                # Quiet buckets in between: the last completed one saw nothing
+                self.completed = dict(self._empty(), window_start=start - self.seconds)
+            self.start, self.current = start, self._empty()
+    
+    def add(self, ts: float, polarity: float):
+        self.advance(ts)
+        if ts < self.start:
+            return  # late post for an already closed bucket
+        
+        self.current["total"] += polarity
+        self.current["count"] += 1
+        self.current["positive"] += polarity > 0
+
+
 class SocialMediaAnalyzer:
-    """Analyze social media sentiment (placeholder)"""
+    """Streaming social sentiment with per-symbol windowed aggregates
+    
+    Windows advance with post timestamps and, on reads, with `clock`, so a
+    symbol whose posts stop arriving ages out instead of freezing. Windows
+    left empty are dropped, and at most `max_keys` (symbol, platform and
+    subreddit) keys are kept, least recently updated first out. Posts with
+    unusable fields are skipped and counted in `rejected`.
+    """
+    
+    def __init__(self, source: PostSource = None, sliding_window_seconds: float = 3600,
+                 tumbling_window_seconds: float = 300, max_posts_per_window: int = 10000,
+                 sentiment_cache: SentimentCache = None, clock=time.time,
+                 max_keys: int = 10000):
+        self.source = source
+        self.sliding_window_seconds = sliding_window_seconds
+        self.tumbling_window_seconds = tumbling_window_seconds
+        self.max_posts_per_window = max_posts_per_window
+        self.max_keys = max_keys
+        self.sentiment_cache = sentiment_cache or SentimentCache(max_size=50000)
+        
+        self._sliding = OrderedDict()
+        self._tumbling = {}
+        self._watermark = 0.0
+        self.clock = clock
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+    
+    def _timestamp(self, value) -> float:
+        """Epoch seconds; raises ValueError/TypeError for anything unparseable"""
+        if value is None:
+            return self.clock()
+        if isinstance(value, (int, float)):
+            ts = float(value)
+        else:
+            ts = pd.Timestamp(value).timestamp()
+        if not math.isfinite(ts):
+            raise ValueError(f"Non-finite timestamp: {value!r}")
+        return ts
+    
+    def _parse(self, post: dict):
+        """(keys, ts, upvote) for a post, or None if it is malformed"""
+        try:
+            symbol = post["symbol"].upper()
+            ts = self._timestamp(post.get("timestamp"))
+            upvote = float(post.get("upvote_ratio", 0.5))
+            keys = [symbol]
+            platform = post.get("platform")
+            if platform:
+                platform = platform.lower()
+                keys.append(f"{platform}:{symbol}")
+                subreddit = post.get("subreddit")
+                if platform == "reddit" and subreddit:
+                    keys.append(self._subreddit_key(subreddit, symbol))
+            return keys, ts, upvote
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            return None
+    
+    @staticmethod
+    def _subreddit_key(subreddit: str, symbol: str) -> str:
+        name = subreddit.lower()
+        return f"reddit/{name[2:] if name.startswith('r/') else name}:{symbol}"
+    
+    def _drop(self, key: str):
+        del self._sliding[key]
+        del self._tumbling[key]
+    
+    def _update(self, key: str, ts: float, polarity: float, upvote: float):
+        window = self._sliding.get(key)
+        if window is None:
+            window = self._sliding[key] = SlidingWindow(
+                self.sliding_window_seconds, self.max_posts_per_window
+            )
+            self._tumbling[key] = TumblingWindow(self.tumbling_window_seconds)
+            while len(self._sliding) > self.max_keys:
+                self._drop(next(iter(self._sliding)))
+        else:
+            self._sliding.move_to_end(key)
+        window.add(ts, polarity, upvote)
+        window.evict(self._watermark)
+        if not window:
+            self._drop(key)  # a post already outside the window
+            return
+        self._tumbling[key].add(ts, polarity)
+    
+    def prune(self) -> int:
+        """Drop windows that have aged out completely; returns keys dropped"""
+        with self._lock:
+            now = max(self._watermark, self.clock())
+            empty = []
+            for key, window in self._sliding.items():
+                window.evict(now)
+                if not window:
+                    empty.append(key)
+            for key in empty:
+                self._drop(key)
+        return len(empty)
+    
+    def ingest(self, posts: list) -> int:
+        """Score posts and fold them into the windows; returns posts accepted"""
+        accepted = []
+        for post in posts:
+            parsed = self._parse(post) if isinstance(post, dict) and post.get("text") else None
+            if parsed is None:
+                self.rejected += 1
+                continue
+            accepted.append((post["text"], parsed))
+        if not accepted:
+            return 0
+        
+        # Everything that can fail is done; the lock only covers the window updates
+        polarities = self.sentiment_cache.get_or_score_batch(
+            [str(text) for text, _ in accepted], score_texts
+        )
+        
+        with self._lock:
+            for (_, (keys, ts, upvote)), polarity in zip(accepted, polarities):
+                self._watermark = max(self._watermark, ts)
+                for key in keys:
+                    self._update(key, ts, polarity, upvote)
+        
+        return len(accepted)
+    
+    def poll(self, max_items: int = 1000) -> int:
+        """Pull one batch from the source; returns posts read (accepted or not)"""
+        if self.source is None:
+            return 0
+        posts = self.source.read(max_items)
+        self.ingest(posts)
+        return len(posts)
+    
+    def start(self, interval: float = 1.0):
+        """Consume the source in a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    if self.poll() == 0:
+                        self.prune()
+                        self._stop.wait(interval)
+                except Exception as e:
+                    print(f"Social ingestion error: {e}")
+                    self._stop.wait(interval)
+        
+        self._thread = threading.Thread(target=loop, name="social-ingest", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background consumer"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def get_symbol_sentiment(self, symbol: str, platform: str = None, subreddit: str = None) -> dict:
+        """Current windowed sentiment for a symbol (no fetching)"""
+        if subreddit:
+            key = self._subreddit_key(subreddit, symbol.upper())
+        else:
+            key = symbol.upper() if platform is None else f"{platform.lower()}:{symbol.upper()}"
+        with self._lock:
+            window = self._sliding.get(key)
+            if window is not None:
+                now = max(self._watermark, self.clock())
+                window.evict(now)
+                if not window:
+                    self._drop(key)
+                    window = None
+            if window is None:
+                return {"sentiment": 0, "post_count": 0, "positive_ratio": 0.5,
+                        "upvote_ratio": 0.5, "last_window": None}
+            
+            tumbling = self._tumbling[key]
+            tumbling.advance(now)
+            count = len(window)
+            completed = tumbling.completed
+            
+            return {
+                "sentiment": window.total / count if count else 0,
+                "post_count": count,
+                "positive_ratio": window.positive / count if count else 0.5,
+                "upvote_ratio": window.upvote_total / count if count else 0.5,
+                "last_window": None if completed is None else {
+                    "start": completed["window_start"],
+                    "sentiment": completed["total"] / completed["count"] if completed["count"] else 0,
+                    "post_count": completed["count"],
+                    "positive_ratio": completed["positive"] / completed["count"] if completed["count"] else 0.5
+                }
+            }
     
     def analyze_twitter_sentiment(self, query: str):
         """Analyze Twitter sentiment for a query"""
-        # TODO: Implement Twitter API integration
+        current = self.get_symbol_sentiment(query, platform="twitter")
         return {
-            "sentiment": 0,
-            "tweet_count": 0,
-            "positive_ratio": 0.5
+            "sentiment": current["sentiment"],
+            "tweet_count": current["post_count"],
+            "positive_ratio": current["positive_ratio"]
         }
     
     def analyze_reddit_sentiment(self, subreddit: str, query: str):
-        """Analyze Reddit sentiment"""
-        # TODO: Implement Reddit API integration
+        """Analyze Reddit sentiment, within one subreddit when given"""
+        current = self.get_symbol_sentiment(query, platform="reddit", subreddit=subreddit)
         return {
-            "sentiment": 0,
-            "post_count": 0,
-            "upvote_ratio": 0.5
-        }
\ No newline at end of file
+            "sentiment": current["sentiment"],
+            "post_count": current["post_count"],
+            "upvote_ratio": current["upvote_ratio"]
+        }
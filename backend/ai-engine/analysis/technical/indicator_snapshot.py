@@ -0,0 +1,46 @@
+import pandas as pd
+from sqlalchemy import delete, insert, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql import func
+
+from models.indicator_snapshot import IndicatorSnapshot
+from .indicators import INDICATOR_COLUMNS
+
+def write_indicator_snapshots(engine, latest: dict, bars, interval: str) -> int:
+    """Upsert one row per (interval, symbol) with the latest indicator values
+    
+    `latest` is latest_indicators() output and `bars` the cycle's BarArray,
+    which supplies each symbol's last bar time and close. Every row goes out
+    in a single INSERT ... ON CONFLICT statement.
+    """
+    if not latest or not len(bars):
+        return 0
+    
+    last = bars.last_per_symbol()
+    times = pd.to_datetime(last.timestamps, unit='ns').to_pydatetime().tolist()  # naive UTC
+    bar_of = {
+        name: (bar_time, close)
+        for name, bar_time, close in zip(last.symbol_names().tolist(), times, last.close.tolist())
+    }
+    rows = [
+        {'interval': interval, 'symbol': symbol, 'bar_time': bar_of[symbol][0],
+         'close': bar_of[symbol][1], **values}
+        for symbol, values in latest.items() if symbol in bar_of
+    ]
+    if not rows:
+        return 0
+    
+    table = IndicatorSnapshot.__table__
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect in ('postgresql', 'sqlite'):
+            stmt = (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(table).values(rows)
+            updates = {name: stmt.excluded[name] for name in ['bar_time', 'close'] + INDICATOR_COLUMNS}
+            updates['updated_at'] = func.now()
+            conn.execute(stmt.on_conflict_do_update(index_elements=['interval', 'symbol'], set_=updates))
+        else:
+            # No portable upsert: swap the rows inside the transaction
+            keys = [(row['interval'], row['symbol']) for row in rows]
+            conn.execute(delete(table).where(tuple_(table.c.interval, table.c.symbol).in_(keys)))
+            conn.execute(insert(table).values(rows))
+    return len(rows)
@@ -30,4 +30,23 @@ def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
     df_indicators['bb_high'] = bb.bollinger_hband()
     df_indicators['bb_low'] = bb.bollinger_lband()
     
-    return df_indicators
\ No newline at end of file
+    return df_indicators
+
+INDICATOR_COLUMNS = ['rsi', 'macd', 'macd_signal', 'macd_diff', 'ma_20', 'ma_50', 'ma_200', 'bb_high', 'bb_low']
+
+def latest_indicators(df: pd.DataFrame, symbol_col: str = 'symbol') -> dict:
+    """Latest indicator values per symbol, as {symbol: {indicator: value}}
+    
+    Each symbol's series is computed on its own, so one symbol's prices never
+    leak into another's rolling windows. Values still warming up are None.
+    """
+    if df.empty or symbol_col not in df.columns:
+        return {}
+    
+    latest = {}
+    for symbol, group in df.groupby(symbol_col, observed=True, sort=False):
+        row = calculate_indicators(group).iloc[-1]
+        latest[str(symbol)] = {
+            name: (None if pd.isna(row[name]) else float(row[name])) for name in INDICATOR_COLUMNS
+        }
+    return latest
@@ -16,4 +16,25 @@ RISK_LEVELS = {
 }
 
 # Signal Types
-SIGNAL_TYPES = ["BUY", "SELL", "HOLD", "STRONG_BUY", "STRONG_SELL"]
\ No newline at end of file
+SIGNAL_TYPES = ["BUY", "SELL", "HOLD", "STRONG_BUY", "STRONG_SELL"]
+
+# Crypto base assets (shared with the API's symbol map)
+CRYPTO_ASSETS = [
+    "BTC", "ETH", "SOL", "BNB", "XRP", "ADA",
+    "DOGE", "DOT", "MATIC", "LINK", "LTC"
+]
+
+# Named stress scenarios: per-asset shocks, asset-class shocks and USD/SLL moves
+STRESS_SCENARIOS = {
+    "btc_crash": {
+        "shocks": {"BTC": -0.30}
+    },
+    "leone_devaluation": {
+        "fx_shock": 0.15  # USD/SLL +15%
+    },
+    "crypto_contagion": {
+        # Correlation -> 1: every crypto asset moves with BTC
+        "shocks": {"BTC": -0.30},
+        "asset_class_shocks": {"crypto": -0.30}
+    }
+}
@@ -7,14 +7,41 @@ load_dotenv()
 AI_UPDATE_INTERVAL = int(os.getenv("AI_UPDATE_INTERVAL", 300))  # 5 minutes
 AI_CONFIDENCE_THRESHOLD = int(os.getenv("AI_CONFIDENCE_THRESHOLD", 70))
 
+# Nightly portfolio risk batch
+RISK_BATCH_TIME = os.getenv("RISK_BATCH_TIME", "00:30")  # HH:MM, local time
+RISK_LOOKBACK_DAYS = int(os.getenv("RISK_LOOKBACK_DAYS", 90))
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", 0.02))
+
 # API Keys
 COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY")
 ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
 
+# Sentiment
+SENTIMENT_CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH", "./cache/sentiment.db")
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", 10000))
+# JSON-lines file of social posts to stream into the social analyzer (empty = disabled)
+SOCIAL_POSTS_PATH = os.getenv("SOCIAL_POSTS_PATH") or None
+
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ai_engine.db")
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+# Cache backend: redis, memory or mmap (a file shared by processes on this host)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "redis")
+CACHE_MMAP_PATH = os.getenv("CACHE_MMAP_PATH", "./cache/kv.mmap")
+CACHE_MMAP_SLOTS = int(os.getenv("CACHE_MMAP_SLOTS", 4096))
+CACHE_MMAP_SLOT_SIZE = int(os.getenv("CACHE_MMAP_SLOT_SIZE", 65536))  # bytes; largest entry is 24 less
+
+# Latest bars and indicators shared with API workers on this host (empty = tmpfs default)
+MARKET_SNAPSHOT_PATH = os.getenv("MARKET_SNAPSHOT_PATH") or None
+
+# Stored bar retention per resolution, in days (0 keeps forever)
+BAR_RETENTION_DAYS = {
+    "5m": int(os.getenv("BAR_RETENTION_RAW_DAYS", 90)),
+    "1h": int(os.getenv("BAR_RETENTION_HOURLY_DAYS", 730)),
+    "1d": int(os.getenv("BAR_RETENTION_DAILY_DAYS", 0))
+}
+
 # Markets to analyze
 CRYPTO_MARKETS = ["bitcoin", "ethereum", "ripple", "cardano"]
 FOREX_PAIRS = ["USD/SLL", "EUR/USD", "GBP/USD"]
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# backend/shared (bar containers) lives beside the engine in a source checkout
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if os.path.isdir(os.path.join(_BACKEND_DIR, "shared")) and _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
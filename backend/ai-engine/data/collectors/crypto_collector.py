@@ -1,28 +1,48 @@
 import yfinance as yf
 import pandas as pd
+from datetime import datetime, timedelta
+from shared.models.market_data import BarArray
 from .base_collector import BaseCollector
+from ..storage.backfill import PRIORITY_URGENT
 
 class CryptoCollector(BaseCollector):
     """Collect cryptocurrency market data"""
     
-    def __init__(self):
+    def __init__(self, backfill=None):
         self.symbols = ["BTC-USD", "ETH-USD", "XRP-USD"]
+        self.backfill = backfill  # BackfillScheduler that refetches failed symbols
     
-    def collect(self) -> pd.DataFrame:
-        """Collect cryptocurrency data"""
-        data_frames = []
+    def collect_bars(self) -> BarArray:
+        """Collect cryptocurrency data as a compact bar array"""
+        parts = []
         
         for symbol in self.symbols:
             try:
                 ticker = yf.Ticker(symbol)
                 hist = ticker.history(period="1d", interval="5m")
-                hist["symbol"] = symbol
-                data_frames.append(hist)
             except Exception as e:
                 print(f"Error collecting {symbol}: {e}")
+                hist = None
+            
+            if hist is None or hist.empty:
+                # yfinance reports many failures as an empty frame rather than an error
+                self._queue_backfill(symbol)
+                continue
+            parts.append(BarArray.from_frame(hist, symbol=symbol))
         
-        if data_frames:
-            return pd.concat(data_frames)
+        return BarArray.concat(parts)
+    
+    def _queue_backfill(self, symbol: str):
+        """Ask the backfill scheduler to refetch the last day of a symbol first"""
+        if self.backfill is not None:
+            now = datetime.utcnow()
+            self.backfill.enqueue(symbol, now - timedelta(days=1), now, priority=PRIORITY_URGENT)
+    
+    def collect(self) -> pd.DataFrame:
+        """Collect cryptocurrency data"""
+        bars = self.collect_bars()
+        if len(bars):
+            return bars.to_frame()
         return pd.DataFrame()
     
     def validate_data(self, data: pd.DataFrame) -> bool:
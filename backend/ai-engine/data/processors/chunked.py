@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+from .data_cleaner import DataCleaner
+from .normalizer import DataNormalizer
+
+
+def read_chunks(path: str, chunksize: int = 100000, **kwargs):
+    """Iterate a CSV history file in fixed-size chunks"""
+    for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs):
+        yield chunk
+
+
+def _tail_per_group(df: pd.DataFrame, group_col: str, n: int) -> pd.DataFrame:
+    """Last n rows of each symbol (or of the whole frame without a symbol column)"""
+    if group_col in df.columns:
+        return df.groupby(df[group_col].to_numpy(), sort=False).tail(n)
+    return df.tail(n)
+
+
+class ChunkedCleaner:
+    """Clean an arbitrarily long bar history chunk by chunk
+    
+    The last 2 x `window` bars of every symbol are carried into the next chunk,
+    so forward-fill and rolling outlier statistics continue across chunk
+    boundaries and memory stays bounded by window x symbols.
+    """
+    
+    def __init__(self, window: int = 50, threshold: float = 3.5,
+                 group_col: str = "symbol", columns=None):
+        self.window = window
+        self.threshold = threshold
+        self.group_col = group_col
+        self.columns = columns
+        self._carry = None
+    
+    def process(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Clean one chunk; chunks must be fed in time order"""
+        if chunk.empty:
+            return chunk
+        
+        chunk = chunk.drop_duplicates()
+        columns = chunk.select_dtypes(include=[np.number]).columns
+        if self.columns is not None:
+            columns = [col for col in self.columns if col in columns]
+        
+        carry_len = 0 if self._carry is None else len(self._carry)
+        frame = chunk if carry_len == 0 else pd.concat([self._carry, chunk])
+        frame = frame.copy()
+        
+        # Carried rows are already filled, so ffill continues from them
+        if self.group_col in frame.columns:
+            keys = frame[self.group_col].to_numpy()
+            filled = frame[columns].groupby(keys, sort=False).ffill()
+            frame[columns] = filled.groupby(keys, sort=False).bfill().to_numpy()
+        else:
+            frame[columns] = frame[columns].ffill().bfill()
+        
+        outliers = DataCleaner.outlier_mask(
+            frame, columns, "rolling", self.group_col, self.window, self.threshold
+        )
+        
+        # The rolling MAD looks at deviations from rolling medians, so two
+        # windows of history are needed to reproduce it exactly
+        self._carry = _tail_per_group(frame, self.group_col, 2 * self.window)
+        
+        keep = ~outliers
+        keep[:carry_len] = False
+        return frame[keep]
+    
+    def reset(self):
+        """Forget carried state"""
+        self._carry = None
+
+
+class ChunkedNormalizer:
+    """Strategy features (returns, log returns, rolling volatility) chunk by chunk"""
+    
+    def __init__(self, window: int = 20, group_col: str = "symbol"):
+        self.window = window
+        self.group_col = group_col
+        self._carry = None
+    
+    def process(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Add feature columns to one chunk; chunks must be fed in time order"""
+        if chunk.empty or "Close" not in chunk.columns:
+            return chunk
+        
+        carry_len = 0 if self._carry is None else len(self._carry)
+        frame = chunk if carry_len == 0 else pd.concat([self._carry, chunk])
+        frame = frame.copy()
+        
+        keys = frame[self.group_col].to_numpy() if self.group_col in frame.columns else None
+        features = DataNormalizer.build_features(frame["Close"].to_numpy(), self.window,
+                                                 group_keys=keys)
+        for name, values in features.items():
+            frame[name] = values
+        
+        # Keep enough raw bars to rebuild the next chunk's first window
+        self._carry = _tail_per_group(
+            frame[chunk.columns], self.group_col, self.window + 1
+        )
+        
+        return frame.iloc[carry_len:].dropna(subset=["returns", "log_returns", "volatility"])
+    
+    def reset(self):
+        """Forget carried state"""
+        self._carry = None
+
+
+class RunningMinMax:
+    """Min/max normalization whose bounds are accumulated across chunks
+    
+    Call update() on every chunk (first pass), then transform() each chunk
+    (second pass) to get the same result as DataCleaner.normalize_data on
+    the full history.
+    """
+    
+    def __init__(self, columns=None):
+        self.columns = columns
+        self.min = None
+        self.max = None
+    
+    def update(self, chunk: pd.DataFrame):
+        """Fold one chunk into the running bounds"""
+        columns = self.columns
+        if columns is None:
+            columns = chunk.select_dtypes(include=[np.number]).columns
+        
+        chunk_min = chunk[columns].min()
+        chunk_max = chunk[columns].max()
+        if self.min is None:
+            self.min, self.max = chunk_min, chunk_max
+        else:
+            self.min = pd.concat([self.min, chunk_min], axis=1).min(axis=1)
+            self.max = pd.concat([self.max, chunk_max], axis=1).max(axis=1)
+    
+    def transform(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Scale a chunk to 0-1 with the accumulated bounds"""
+        if self.min is None:
+            return chunk
+        
+        chunk = chunk.copy()
+        for col in self.min.index:
+            if col in chunk.columns and self.max[col] > self.min[col]:
+                chunk[col] = (chunk[col] - self.min[col]) / (self.max[col] - self.min[col])
+        return chunk
+
+
+def process_history_file(path: str, out_path: str, chunksize: int = 100000,
+                         cleaner: ChunkedCleaner = None,
+                         normalizer: ChunkedNormalizer = None) -> int:
+    """Clean and derive features for a CSV history in constant memory"""
+    cleaner = cleaner or ChunkedCleaner()
+    normalizer = normalizer or ChunkedNormalizer()
+    
+    rows = 0
+    for i, chunk in enumerate(read_chunks(path, chunksize)):
+        result = normalizer.process(cleaner.process(chunk))
+        result.to_csv(out_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        rows += len(result)
+    
+    return rows
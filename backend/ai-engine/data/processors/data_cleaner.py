@@ -5,26 +5,83 @@ class DataCleaner:
     """Clean and prepare market data"""
     
     @staticmethod
-    def clean_market_data(df: pd.DataFrame) -> pd.DataFrame:
-        """Clean market data"""
+    def clean_market_data(df: pd.DataFrame, method: str = "iqr", columns=None,
+                          group_col: str = "symbol", window: int = 50,
+                          threshold: float = 3.5) -> pd.DataFrame:
+        """Clean market data
+        
+        Outlier masks for all columns are computed in one pass, per symbol,
+        on the same frame. method is "iqr", "mad" (median absolute deviation)
+        or "rolling" (rolling median/MAD over `window` bars, for streaming).
+        """
         if df.empty:
             return df
         
         # Remove duplicates
         df = df.drop_duplicates()
         
-        # Handle missing values
         numeric_cols = df.select_dtypes(include=[np.number]).columns
-        df[numeric_cols] = df[numeric_cols].ffill().bfill()
+        if columns is not None:
+            numeric_cols = [col for col in columns if col in numeric_cols]
+        grouped = group_col in df.columns
+        
+        # Handle missing values without filling across symbols
+        df = df.copy()
+        if grouped:
+            keys = df[group_col].to_numpy()
+            filled = df[numeric_cols].groupby(keys, sort=False).ffill()
+            df[numeric_cols] = filled.groupby(keys, sort=False).bfill().to_numpy()
+        else:
+            df[numeric_cols] = df[numeric_cols].ffill().bfill()
+        
+        outliers = DataCleaner.outlier_mask(df, numeric_cols, method, group_col, window, threshold)
+        return df[~outliers]
+    
+    @staticmethod
+    def outlier_mask(df: pd.DataFrame, columns, method: str = "iqr",
+                     group_col: str = "symbol", window: int = 50,
+                     threshold: float = 3.5) -> np.ndarray:
+        """Boolean row mask, True where any column is an outlier for its symbol"""
+        if len(columns) == 0:
+            return np.zeros(len(df), dtype=bool)
+        
+        values = df[columns].to_numpy(dtype=np.float64)
+        if group_col in df.columns:
+            keys = df[group_col]
+        else:
+            keys = pd.Series(0, index=df.index)
+        grouped = df[columns].groupby(keys.to_numpy(), sort=False)
+        
+        def per_row(stat: pd.DataFrame) -> np.ndarray:
+            # Broadcast per-symbol statistics back onto the rows
+            return stat.reindex(keys.to_numpy()).to_numpy(dtype=np.float64)
         
-        # Remove outliers (using IQR method)
-        for col in numeric_cols:
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            df = df[~((df[col] < (Q1 - 1.5 * IQR)) | (df[col] > (Q3 + 1.5 * IQR)))]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if method == "iqr":
+                q1 = per_row(grouped.quantile(0.25))
+                q3 = per_row(grouped.quantile(0.75))
+                iqr = q3 - q1
+                mask = (values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)
+            elif method == "mad":
+                median = per_row(grouped.median())
+                abs_dev = pd.DataFrame(np.abs(values - median), index=df.index, columns=columns)
+                mad = per_row(abs_dev.groupby(keys.to_numpy(), sort=False).median())
+                mask = 0.6745 * np.abs(values - median) > threshold * mad
+            elif method == "rolling":
+                # Trailing window per symbol, so the mask only uses past bars
+                median = grouped.transform(
+                    lambda s: s.rolling(window, min_periods=window // 2).median()
+                ).to_numpy(dtype=np.float64)
+                abs_dev = pd.DataFrame(np.abs(values - median), index=df.index, columns=columns)
+                mad = abs_dev.groupby(keys.to_numpy(), sort=False).transform(
+                    lambda s: s.rolling(window, min_periods=window // 2).median()
+                ).to_numpy(dtype=np.float64)
+                mask = 0.6745 * np.abs(values - median) > threshold * mad
+            else:
+                raise ValueError(f"Unknown outlier method: {method}")
         
-        return df
+        # NaN comparisons are False, so rows without enough history are kept
+        return mask.any(axis=1)
     
     @staticmethod
     def normalize_data(df: pd.DataFrame, columns=None) -> pd.DataFrame:
@@ -1,23 +1,68 @@
+import numpy as np
 import pandas as pd
 
 class DataNormalizer:
     """Normalize data for analysis"""
     
     @staticmethod
-    def normalize_for_strategy(df: pd.DataFrame) -> pd.DataFrame:
+    def build_features(close, window: int = 20, dtype=np.float64, group_keys=None) -> dict:
+        """Returns, log returns and rolling volatility in one pass over preallocated arrays
+        
+        With group_keys, each group (symbol) is treated as its own series while
+        the output stays in input row order. Computation is float64; only the
+        outputs use `dtype`.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        n = len(close)
+        
+        order = None
+        if group_keys is not None:
+            group_keys = np.asarray(group_keys)
+            order = np.argsort(group_keys, kind="stable")
+            close = close[order]
+        
+        returns = np.full(n, np.nan)
+        if n > 1:
+            np.divide(close[1:], close[:-1], out=returns[1:])
+            returns[1:] -= 1
+            if order is not None:
+                # No return across a symbol boundary
+                sorted_keys = group_keys[order]
+                returns[1:][sorted_keys[1:] != sorted_keys[:-1]] = np.nan
+        
+        log_returns = np.log1p(returns)
+        
+        # Rolling std over the raw array (ddof=1); a NaN, including a symbol
+        # boundary, leaves the window incomplete exactly like pandas does
+        volatility = pd.Series(returns, copy=False).rolling(window).std().to_numpy()
+        
+        if order is not None:
+            inverse = np.empty_like(order)
+            inverse[order] = np.arange(n)
+            returns, log_returns, volatility = returns[inverse], log_returns[inverse], volatility[inverse]
+        
+        return {
+            "returns": returns.astype(dtype, copy=False),
+            "log_returns": log_returns.astype(dtype, copy=False),
+            "volatility": volatility.astype(dtype, copy=False)
+        }
+    
+    @staticmethod
+    def normalize_for_strategy(df: pd.DataFrame, window: int = 20,
+                               dtype=np.float64) -> pd.DataFrame:
         """Prepare data for strategy analysis"""
         if df.empty:
             return df
         
-        df_normalized = df.copy()
+        if 'Close' not in df.columns:
+            return df.dropna()
         
-        # Calculate returns
-        if 'Close' in df.columns:
-            df_normalized['returns'] = df['Close'].pct_change()
-            df_normalized['log_returns'] = np.log(df['Close'] / df['Close'].shift(1))
+        features = DataNormalizer.build_features(df['Close'].to_numpy(), window, dtype)
         
-        # Calculate volatility
-        if 'returns' in df_normalized.columns:
-            df_normalized['volatility'] = df_normalized['returns'].rolling(window=20).std()
+        # Same rows as the old dropna(): complete input rows with full features
+        keep = ~np.isnan(features['volatility'])
+        keep &= ~df.isna().to_numpy().any(axis=1)
         
-        return df_normalized.dropna()
\ No newline at end of file
+        # Single row selection; feature columns are attached without reindexing
+        df_normalized = df.iloc[np.flatnonzero(keep)]
+        return df_normalized.assign(**{name: values[keep] for name, values in features.items()})
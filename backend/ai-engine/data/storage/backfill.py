@@ -0,0 +1,310 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from shared.models.market_data import BarArray
+
+INTERVALS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1)
+}
+
+# Priorities: lower runs first
+PRIORITY_URGENT = 0  # a live collection just failed
+PRIORITY_NORMAL = 1  # found by a periodic scan
+
+
+def _to_ns(value) -> int:
+    """datetime / Timestamp / epoch-ns int to epoch ns (naive means UTC)"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tz is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.as_unit("ns").value
+
+
+def find_gaps(timestamps, interval, start=None, end=None, tolerance: float = 1.5) -> list:
+    """Missing bar ranges in a series as (first_missing_ns, last_missing_ns) pairs
+    
+    Any step longer than tolerance x interval counts as a gap, so this suits
+    24/7 markets; exchange-closed periods would show up as gaps too.
+    """
+    interval_ns = pd.Timedelta(interval).value
+    ts = np.unique(np.asarray(timestamps, dtype=np.int64))
+    start_ns = None if start is None else _to_ns(start)
+    end_ns = None if end is None else _to_ns(end)
+    
+    if start_ns is not None:
+        ts = ts[ts >= start_ns]
+    if end_ns is not None:
+        ts = ts[ts <= end_ns]
+    
+    if len(ts) == 0:
+        if start_ns is not None and end_ns is not None and end_ns >= start_ns:
+            return [(start_ns, end_ns)]
+        return []
+    
+    limit = int(tolerance * interval_ns)
+    steps = np.diff(ts)
+    where = np.flatnonzero(steps > limit)
+    gaps = list(zip((ts[where] + interval_ns).tolist(), (ts[where + 1] - interval_ns).tolist()))
+    
+    if start_ns is not None and ts[0] - start_ns > limit - interval_ns:
+        gaps.insert(0, (start_ns, int(ts[0]) - interval_ns))
+    if end_ns is not None and end_ns - ts[-1] > limit - interval_ns:
+        gaps.append((int(ts[-1]) + interval_ns, end_ns))
+    
+    return gaps
+
+
+def fetch_yfinance(symbol: str, start_ns: int, end_ns: int, interval: str) -> BarArray:
+    """Bars for [start, end] from yfinance"""
+    # yfinance's end is exclusive
+    end = pd.Timestamp(end_ns, tz="UTC") + INTERVALS.get(interval, timedelta(0))
+    hist = yf.Ticker(symbol).history(
+        start=pd.Timestamp(start_ns, tz="UTC").to_pydatetime(),
+        end=end.to_pydatetime(),
+        interval=interval
+    )
+    return BarArray.from_frame(hist, symbol=symbol)
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per `per` seconds, bursting up to `rate`"""
+    
+    def __init__(self, rate: int, per: float = 60.0):
+        self.capacity = float(rate)
+        self.fill_rate = rate / per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self) -> float:
+        """Take a token; returns 0, or the seconds to wait before retrying"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.fill_rate
+
+
+class BackfillScheduler:
+    """Find holes in the stored bar series and refetch only those ranges
+    
+    Tasks sit in a priority queue (urgent first, then most recent gap first,
+    since recent bars feed live indicator state); provider calls go through
+    a token bucket and failures are retried with exponential backoff. An
+    empty response is retried the same way, since providers often return
+    nothing transiently; only after `max_attempts` is the range parked as
+    unfillable, and only for `unfillable_ttl`.
+    """
+    
+    def __init__(self, db, symbols: list, interval: str = "5m", fetcher=None,
+                 requests_per_minute: int = 30, max_span: timedelta = timedelta(days=7),
+                 max_lookback: timedelta = timedelta(days=59), max_attempts: int = 3,
+                 retry_delay: float = 60.0, source: str = "yfinance",
+                 unfillable_ttl: timedelta = timedelta(hours=6)):
+        self.db = db
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.interval_ns = pd.Timedelta(INTERVALS[interval]).value
+        self.fetcher = fetcher or fetch_yfinance
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        self.max_span_ns = pd.Timedelta(max_span).value
+        self.max_lookback = max_lookback  # provider keeps intraday history this long
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.source = source
+        self.unfillable_ttl = pd.Timedelta(unfillable_ttl).total_seconds()
+        
+        self._queue = []  # (priority, -end_ns, seq, task)
+        self._deferred = []  # (not_before, seq, task) awaiting retry
+        self._pending = set()
+        self._unfillable = {}  # symbol -> [(start, end, retry_after)] the provider had nothing for
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        
+        self.bars_written = 0
+        self.requests = 0
+        self.failures = 0
+        self.empty_responses = 0
+        self.save_errors = 0
+    
+    def _is_unfillable(self, symbol: str, start_ns: int, end_ns: int) -> bool:
+        ranges = self._unfillable.get(symbol)
+        if not ranges:
+            return False
+        now = time.monotonic()
+        ranges[:] = [r for r in ranges if r[2] > now]
+        return any(s <= start_ns and end_ns <= e for s, e, _ in ranges)
+    
+    def _retry_later(self, task: dict, reason) -> bool:
+        """Defer a task with exponential backoff; False once its attempts are used up"""
+        task["attempts"] += 1
+        if task["attempts"] >= self.max_attempts:
+            print(f"Backfill gave up on {task['symbol']} after {task['attempts']} attempts: {reason}")
+            return False
+        not_before = time.monotonic() + self.retry_delay * 2 ** (task["attempts"] - 1)
+        with self._lock:
+            heapq.heappush(self._deferred, (not_before, next(self._seq), task))
+        return True
+    
+    def enqueue(self, symbol: str, start, end, priority: int = PRIORITY_NORMAL) -> int:
+        """Queue a missing range, split into provider-sized requests"""
+        earliest = _to_ns(datetime.utcnow() - self.max_lookback)
+        start_ns, end_ns = max(_to_ns(start), earliest), _to_ns(end)
+        
+        added = 0
+        with self._lock:
+            for chunk_start in range(start_ns, end_ns + 1, self.max_span_ns):
+                chunk_end = min(chunk_start + self.max_span_ns - self.interval_ns, end_ns)
+                key = (symbol, chunk_start, chunk_end)
+                if key in self._pending or self._is_unfillable(symbol, chunk_start, chunk_end):
+                    continue
+                
+                task = {"symbol": symbol, "start": chunk_start, "end": chunk_end,
+                        "priority": priority, "attempts": 0}
+                heapq.heappush(self._queue, (priority, -chunk_end, next(self._seq), task))
+                self._pending.add(key)
+                added += 1
+        return added
+    
+    def scan(self, symbols: list = None, start=None, end=None) -> int:
+        """Detect gaps in the stored series and queue them; returns tasks added"""
+        end = end or datetime.utcnow() - INTERVALS[self.interval]
+        start = start or datetime.utcnow() - self.max_lookback
+        
+        added = 0
+        for symbol in symbols or self.symbols:
+            stored = self.db.get_bar_timestamps(symbol, pd.Timestamp(_to_ns(start)).to_pydatetime(),
+                                                pd.Timestamp(_to_ns(end)).to_pydatetime())
+            for gap_start, gap_end in find_gaps(stored, INTERVALS[self.interval], start, end):
+                added += self.enqueue(symbol, gap_start, gap_end)
+        return added
+    
+    def _next_task(self):
+        with self._lock:
+            now = time.monotonic()
+            while self._deferred and self._deferred[0][0] <= now:
+                _, seq, task = heapq.heappop(self._deferred)
+                heapq.heappush(self._queue, (task["priority"], -task["end"], seq, task))
+            if not self._queue:
+                return None
+            return heapq.heappop(self._queue)[3]
+    
+    def _run_task(self, task: dict) -> int:
+        key = (task["symbol"], task["start"], task["end"])
+        try:
+            self.requests += 1
+            bars = self.fetcher(task["symbol"], task["start"], task["end"], self.interval)
+        except Exception as e:
+            self.failures += 1
+            if not self._retry_later(task, e):
+                with self._lock:
+                    self._pending.discard(key)
+            return 0
+        
+        # Only the requested hole; the provider may return neighbouring bars
+        in_range = (bars.timestamps >= task["start"]) & (bars.timestamps <= task["end"])
+        if not in_range.any():
+            self.empty_responses += 1
+            if not self._retry_later(task, "no bars returned"):
+                with self._lock:
+                    self._pending.discard(key)
+                    self._unfillable.setdefault(task["symbol"], []).append(
+                        (task["start"], task["end"], time.monotonic() + self.unfillable_ttl)
+                    )
+            return 0
+        
+        try:
+            written = self.db.save_bars(bars[in_range], source=self.source)
+        except Exception as e:
+            # e.g. a locked SQLite file; refetched on the retry
+            self.save_errors += 1
+            if not self._retry_later(task, e):
+                with self._lock:
+                    self._pending.discard(key)
+            return 0
+        
+        with self._lock:
+            self._pending.discard(key)
+        self.bars_written += written
+        return written
+    
+    def run_pending(self, max_tasks: int = None, block: bool = True) -> int:
+        """Work through queued tasks under the rate limit; returns bars written"""
+        written = 0
+        done = 0
+        while max_tasks is None or done < max_tasks:
+            task = self._next_task()
+            if task is None:
+                break
+            
+            wait = self.rate_limiter.try_acquire()
+            while wait and block and not self._stop.wait(wait):
+                wait = self.rate_limiter.try_acquire()
+            if wait:
+                with self._lock:
+                    heapq.heappush(self._queue, (task["priority"], -task["end"], next(self._seq), task))
+                break
+            
+            written += self._run_task(task)
+            done += 1
+        return written
+    
+    def start(self, scan_interval: float = 3600, idle_interval: float = 5.0):
+        """Scan periodically and backfill in a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        
+        def loop():
+            next_scan = 0.0
+            while not self._stop.is_set():
+                try:
+                    if time.monotonic() >= next_scan:
+                        self.scan()
+                        next_scan = time.monotonic() + scan_interval
+                    self.run_pending()
+                except Exception as e:
+                    print(f"Backfill error: {e}")
+                self._stop.wait(idle_interval)
+        
+        self._thread = threading.Thread(target=loop, name="bar-backfill", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def stats(self) -> dict:
+        """Queue depth and work counters"""
+        with self._lock:
+            return {
+                "queued": len(self._queue),
+                "deferred": len(self._deferred),
+                "unfillable": sum(len(ranges) for ranges in self._unfillable.values()),
+                "requests": self.requests,
+                "failures": self.failures,
+                "empty_responses": self.empty_responses,
+                "save_errors": self.save_errors,
+                "bars_written": self.bars_written
+            }
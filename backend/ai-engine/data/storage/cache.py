@@ -1,50 +1,514 @@
-import redis
-import json
-import pickle
-from datetime import timedelta
-import os
+import logging
+import math
+import random
+import struct
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .cache_backends import (
+    CacheBackend, ItemTooLarge, LocalInvalidationBus, RedisBackend, RedisInvalidationBus, make_backend
+)
+from .codecs import Serializer
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE_PREFIX = "cache:ns:"
+ALL_KEYS = "*"
+
+# get_or_compute entries carry (soft expiry, compute seconds) ahead of the payload
+_ENVELOPE = b"E"
+_ENVELOPE_HEADER = struct.Struct("<dd")
+
+
+class LocalCache:
+    """In-process LRU cache with per-entry TTL and a size bound
+    
+    Values are returned as stored, not copied; treat them as read-only.
+    """
+    
+    def __init__(self, max_size: int = 10000, default_ttl: float = 30.0):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key: str, value, ttl: float = None):
+        ttl = self.default_ttl if ttl is None else min(ttl, self.default_ttl)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self):
+        return len(self._data)
+
 
 class CacheManager:
-    """Redis cache manager"""
+    """Cache manager with an in-process L1 tier over a pluggable backend
+    
+    The backend is Redis by default, or an in-memory or memory-mapped file
+    store (CACHE_BACKEND=memory|mmap) for single-node and test setups. Reads
+    hit the local LRU first; writes and deletes go to the backend and are
+    broadcast so other processes drop their stale local copies.
     
-    def __init__(self):
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        self.redis_client = redis.from_url(redis_url)
+    Namespace generations are cached for `generation_ttl` seconds, which
+    bounds staleness when an invalidation message is missed; without a bus
+    they are re-read from the backend on every use.
+    """
+    
+    def __init__(self, redis_url: str = None, local_max_size: int = 10000,
+                 local_ttl: float = 30.0, invalidation_bus=None, redis_client=None,
+                 serializer: Serializer = None, backend: CacheBackend = None,
+                 generation_ttl: float = 5.0):
+        if backend is None:
+            backend = RedisBackend(redis_client) if redis_client is not None else make_backend(redis_url=redis_url)
+        self.backend = backend
+        self.serializer = serializer or Serializer()
+        self.instance_id = uuid.uuid4().hex
+        
+        self.invalidation_bus = invalidation_bus or backend.make_invalidation_bus()
+        if self.invalidation_bus is None:
+            local_max_size = 0  # no way to hear about other writers; read through
+            generation_ttl = 0
+        self.local = LocalCache(max_size=local_max_size, default_ttl=local_ttl)
+        self.generation_ttl = generation_ttl
+        
+        # get_or_compute results the backend refused (too large); kept in
+        # process until their ttl so callers are not left recomputing
+        self.unstored = LocalCache(max_size=1024, default_ttl=float("inf"))
+        
+        self.backend_hits = 0
+        self.backend_misses = 0
+        self.computes = 0
+        self.early_refreshes = 0
+        self.stale_served = 0
+        self.oversize = 0
+        
+        # Namespace -> (generation, monotonic time read); bumping it orphans every key in the namespace
+        self._generations = {}
+        
+        # Single-flight state for get_or_compute; key -> [lock, holders], dropped when unused
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+        self._refreshing = set()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+        
+        if self.invalidation_bus is not None:
+            try:
+                self.invalidation_bus.subscribe(self._on_invalidate)
+            except Exception as e:
+                print(f"Cache invalidation subscribe error: {e}")
+    
+    def _on_invalidate(self, message: dict):
+        if message.get("sender") == self.instance_id:
+            return
+        if "namespace" in message:
+            self._generations[message["namespace"]] = (message["generation"], time.monotonic())
+            return
+        key = message.get("key")
+        if key == ALL_KEYS:
+            self.local.clear()
+            self.unstored.clear()
+            self._generations.clear()
+        elif key is not None:
+            self.local.delete(key)
+            self.unstored.delete(key)
+        for key in message.get("keys", ()):
+            self.local.delete(key)
+            self.unstored.delete(key)
+    
+    def _publish(self, message: dict):
+        if self.invalidation_bus is None:
+            return
+        try:
+            self.invalidation_bus.publish(dict(message, sender=self.instance_id))
+        except Exception as e:
+            print(f"Cache invalidation publish error: {e}")
+    
+    def _broadcast(self, key: str):
+        self._publish({"key": key})
+    
+    def _generation(self, namespace: str) -> int:
+        now = time.monotonic()
+        cached = self._generations.get(namespace)
+        if cached is not None and now - cached[1] < self.generation_ttl:
+            return cached[0]
+        generation = int(self.backend.get(NAMESPACE_PREFIX + namespace) or 0)
+        self._generations[namespace] = (generation, now)
+        return generation
+    
+    def namespace_key(self, namespace: str, key: str) -> str:
+        """Key inside a namespace, tagged with the namespace's current generation"""
+        return f"{namespace}:{self._generation(namespace)}:{key}"
+    
+    def invalidate_namespace(self, namespace: str) -> int:
+        """Drop every key of a namespace at once (no SCAN, no flushdb)
+        
+        The generation counter is bumped, so old keys are never read again
+        and simply expire via their TTL.
+        """
+        try:
+            generation = self.backend.incr(NAMESPACE_PREFIX + namespace)
+        except Exception as e:
+            print(f"Cache namespace invalidation error: {e}")
+            return self._generations.get(namespace, (0, 0))[0]
+        self._generations[namespace] = (generation, time.monotonic())
+        self._publish({"namespace": namespace, "generation": generation})
+        return generation
     
     def set(self, key: str, value, expire_minutes: int = 5):
-        """Set cache value with expiration"""
+        """Set cache value with expiration
+        
+        A value the serializer cannot encode raises TypeError rather than
+        quietly going uncached; backend failures return False.
+        """
+        serialized = self.serializer.dumps(value)
         try:
-            serialized = pickle.dumps(value)
-            self.redis_client.setex(key, timedelta(minutes=expire_minutes), serialized)
+            self.backend.set(key, serialized, expire_minutes * 60)
+            self.local.set(key, value, expire_minutes * 60)
+            self._broadcast(key)
             return True
+        except ItemTooLarge as e:
+            self.oversize += 1
+            logger.warning(f"Cache entry too large, not cached: {e}")
+            return False
         except Exception as e:
             print(f"Cache set error: {e}")
             return False
     
+    def _decode(self, data: bytes):
+        """(value, soft_expiry, compute_seconds); the last two are None for plain entries"""
+        if data[:1] == _ENVELOPE:
+            soft_expiry, delta = _ENVELOPE_HEADER.unpack_from(data, 1)
+            return self.serializer.loads(data[1 + _ENVELOPE_HEADER.size:]), soft_expiry, delta
+        return self.serializer.loads(data), None, None
+    
+    def _fetch(self, key: str):
+        """Backend lookup that also fills L1; returns (value, soft_expiry, delta) or None"""
+        # Value and remaining TTL together, so L1 never outlives the backend
+        data, ttl = self.backend.get_many_with_ttl([key])[0]
+        if not data:
+            self.backend_misses += 1
+            return None
+        
+        self.backend_hits += 1
+        value, soft_expiry, delta = self._decode(data)
+        if soft_expiry is not None:
+            ttl = soft_expiry - time.time()  # L1 never serves past the soft expiry
+        if ttl is None or ttl > 0:
+            self.local.set(key, value, ttl)
+        return value, soft_expiry, delta
+    
     def get(self, key: str):
         """Get cache value"""
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        
         try:
-            data = self.redis_client.get(key)
-            if data:
-                return pickle.loads(data)
-            return None
+            entry = self._fetch(key)
+            return None if entry is None else entry[0]
         except Exception as e:
             print(f"Cache get error: {e}")
             return None
     
+    def get_many(self, keys, namespace: str = None) -> dict:
+        """Values for many keys: L1 first, then one batched backend call
+        
+        Missing keys are left out of the result.
+        """
+        keys = list(keys)
+        try:
+            full_keys = [self.namespace_key(namespace, k) for k in keys] if namespace else keys
+        except Exception as e:
+            print(f"Cache get error: {e}")
+            return {}
+        
+        results = {}
+        missing = []
+        for key, full_key in zip(keys, full_keys):
+            value = self.local.get(full_key)
+            if value is None:
+                missing.append((key, full_key))
+            else:
+                results[key] = value
+        if not missing:
+            return results
+        
+        try:
+            replies = self.backend.get_many_with_ttl([full_key for _, full_key in missing])
+        except Exception as e:
+            print(f"Cache get error: {e}")
+            return results
+        
+        for (key, full_key), (data, ttl) in zip(missing, replies):
+            if not data:
+                self.backend_misses += 1
+                continue
+            try:
+                value, soft_expiry, _ = self._decode(data)
+            except Exception as e:
+                print(f"Cache decode error for {full_key}: {e}")
+                continue
+            self.backend_hits += 1
+            if soft_expiry is not None:
+                ttl = soft_expiry - time.time()
+            if ttl is None or ttl > 0:
+                self.local.set(full_key, value, ttl)
+            results[key] = value
+        return results
+    
+    def set_many(self, items: dict, expire_minutes: float = 5, ttls: dict = None,
+                 namespace: str = None) -> bool:
+        """Store many values in one batched backend call (a Redis pipeline)
+        
+        `ttls` maps individual keys to their own expiry in minutes,
+        overriding `expire_minutes`.
+        """
+        ttls = ttls or {}
+        written = []
+        for key, value in items.items():
+            full_key = self.namespace_key(namespace, key) if namespace else key
+            written.append((full_key, value, ttls.get(key, expire_minutes) * 60))
+        # Encoding errors propagate, as in set()
+        rows = [(full_key, self.serializer.dumps(value), ttl) for full_key, value, ttl in written]
+        try:
+            self.backend.set_many(rows)
+        except ItemTooLarge as e:
+            self.oversize += 1
+            logger.warning(f"Cache entry too large, batch not cached: {e}")
+            return False
+        except Exception as e:
+            print(f"Cache set error: {e}")
+            return False
+        
+        for full_key, value, ttl in written:
+            self.local.set(full_key, value, ttl)
+        self._publish({"keys": [full_key for full_key, _, _ in written]})
+        return True
+    
+    @contextmanager
+    def _key_lock(self, key: str):
+        with self._key_locks_guard:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._key_locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+    
+    def _compute_and_store(self, key: str, fn, ttl: float, stale_ttl: float):
+        start = time.time()
+        value = fn()
+        delta = time.time() - start
+        self.computes += 1
+        
+        data = _ENVELOPE + _ENVELOPE_HEADER.pack(time.time() + ttl, delta) + self.serializer.dumps(value)
+        try:
+            self.backend.set(key, data, ttl + stale_ttl)
+            self._broadcast(key)
+        except ItemTooLarge as e:
+            # Serve it from this process rather than recompute on every call
+            self.oversize += 1
+            self.unstored.set(key, value, ttl)
+            logger.warning(f"Cache entry too large, keeping {key} in process only: {e}")
+        except Exception as e:
+            print(f"Cache set error: {e}")
+        self.local.set(key, value, ttl)
+        return value
+    
+    def _refresh(self, key: str, fn, ttl: float, stale_ttl: float, lock_timeout: float):
+        """Background recompute; skipped if another process already holds the key's lock"""
+        token = uuid.uuid4().hex.encode()
+        try:
+            if self.backend.set(f"lock:{key}", token, lock_timeout, nx=True):
+                try:
+                    self._compute_and_store(key, fn, ttl, stale_ttl)
+                finally:
+                    self.backend.delete_if_equals(f"lock:{key}", token)
+        except Exception as e:
+            print(f"Cache refresh error for {key}: {e}")
+        finally:
+            with self._key_locks_guard:
+                self._refreshing.discard(key)
+    
+    def _schedule_refresh(self, key: str, fn, ttl: float, stale_ttl: float, lock_timeout: float):
+        with self._key_locks_guard:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._refresh_pool.submit(self._refresh, key, fn, ttl, stale_ttl, lock_timeout)
+    
+    def get_or_compute(self, key: str, fn, ttl: float, stale_ttl: float = None,
+                       beta: float = 1.0, lock_timeout: float = 30.0, wait_timeout: float = 10.0):
+        """Cached value of fn(), recomputed by one caller at a time
+        
+        `ttl` is in seconds. Near expiry a hit may trigger an early background
+        refresh (XFetch: probability grows with fn's cost and as expiry
+        nears, scaled by `beta`). For `stale_ttl` seconds after expiry the
+        stale value is served while one refresh runs. Misses are single-flight
+        within the process (per-key lock) and across processes (backend lock);
+        waiters poll for the winner's result.
+        """
+        stale_ttl = ttl if stale_ttl is None else stale_ttl
+        
+        value = self.local.get(key)
+        if value is None:
+            value = self.unstored.get(key)
+        if value is not None:
+            return value
+        
+        try:
+            entry = self._fetch(key)
+        except Exception as e:
+            print(f"Cache get error: {e}")
+            entry = None
+        
+        if entry is not None:
+            value, soft_expiry, delta = entry
+            now = time.time()
+            if soft_expiry is None:
+                return value  # written by set(); no refresh metadata
+            if now >= soft_expiry:
+                self.stale_served += 1
+                self._schedule_refresh(key, fn, ttl, stale_ttl, lock_timeout)
+            elif now - delta * beta * math.log(1.0 - random.random()) >= soft_expiry:
+                self.early_refreshes += 1
+                self._schedule_refresh(key, fn, ttl, stale_ttl, lock_timeout)
+            return value
+        
+        with self._key_lock(key):
+            # Another thread may have filled it while we waited
+            value = self.local.get(key)
+            if value is None:
+                value = self.unstored.get(key)
+            if value is not None:
+                return value
+            try:
+                entry = self._fetch(key)
+            except Exception as e:
+                print(f"Cache get error: {e}")
+                entry = None
+            if entry is not None:
+                return entry[0]
+            
+            token = uuid.uuid4().hex.encode()
+            try:
+                acquired = self.backend.set(f"lock:{key}", token, lock_timeout, nx=True)
+            except Exception as e:
+                print(f"Cache lock error: {e}")
+                return self._compute_and_store(key, fn, ttl, stale_ttl)
+            
+            if acquired:
+                try:
+                    return self._compute_and_store(key, fn, ttl, stale_ttl)
+                finally:
+                    try:
+                        self.backend.delete_if_equals(f"lock:{key}", token)
+                    except Exception as e:
+                        print(f"Cache unlock error: {e}")
+            
+            # Another process is computing; wait for its result
+            deadline = time.monotonic() + wait_timeout
+            delay = 0.01
+            while time.monotonic() < deadline:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.25)
+                try:
+                    entry = self._fetch(key)
+                except Exception as e:
+                    print(f"Cache get error: {e}")
+                    break
+                if entry is not None:
+                    return entry[0]
+            
+            return self._compute_and_store(key, fn, ttl, stale_ttl)
+    
     def delete(self, key: str):
         """Delete cache key"""
+        self.local.delete(key)
+        self.unstored.delete(key)
         try:
-            return self.redis_client.delete(key)
+            deleted = self.backend.delete(key)
+            self._broadcast(key)
+            return deleted
         except Exception as e:
             print(f"Cache delete error: {e}")
             return 0
     
     def clear_all(self):
         """Clear all cache"""
+        self.local.clear()
+        self.unstored.clear()
         try:
-            self.redis_client.flushdb()
+            self.backend.clear()
+            self._broadcast(ALL_KEYS)
             return True
         except Exception as e:
             print(f"Cache clear error: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def stats(self) -> dict:
+        """Hit ratios per tier (the backend only sees L1 misses)"""
+        local_lookups = self.local.hits + self.local.misses
+        backend_lookups = self.backend_hits + self.backend_misses
+        return {
+            "backend": self.backend.name,
+            "local_hits": self.local.hits,
+            "local_misses": self.local.misses,
+            "local_hit_ratio": self.local.hits / local_lookups if local_lookups else 0,
+            "local_size": len(self.local),
+            "backend_hits": self.backend_hits,
+            "backend_misses": self.backend_misses,
+            "backend_hit_ratio": self.backend_hits / backend_lookups if backend_lookups else 0,
+            "overall_hit_ratio": (self.local.hits + self.backend_hits) / local_lookups if local_lookups else 0,
+            "computes": self.computes,
+            "early_refreshes": self.early_refreshes,
+            "stale_served": self.stale_served,
+            "oversize": self.oversize
+        }
+    
+    def close(self):
+        """Stop listening for invalidations and background refreshes"""
+        if self.invalidation_bus is not None:
+            # The bus may be shared with other managers; only drop our listener
+            self.invalidation_bus.unsubscribe(self._on_invalidate)
+        self._refresh_pool.shutdown(wait=False)
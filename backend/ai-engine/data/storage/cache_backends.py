@@ -0,0 +1,491 @@
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+from config.settings import (
+    CACHE_BACKEND, CACHE_MMAP_PATH, CACHE_MMAP_SLOTS, CACHE_MMAP_SLOT_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LocalInvalidationBus:
+    """In-process stand-in for Redis pub/sub (tests, single-process deployments)
+    
+    One bus is shared by every manager over the same backend instance.
+    """
+    
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+    
+    def publish(self, message: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(message)
+    
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+    
+    def close(self):
+        with self._lock:
+            self._subscribers.clear()
+
+
+class ItemTooLarge(ValueError):
+    """The encoded value does not fit the backend's per-item limit"""
+
+
+class RedisInvalidationBus:
+    """Invalidation messages over a Redis pub/sub channel"""
+    
+    def __init__(self, redis_client, channel: str = INVALIDATION_CHANNEL):
+        self.redis_client = redis_client
+        self.channel = channel
+        self._pubsub = None
+        self._thread = None
+    
+    def publish(self, message: dict):
+        self.redis_client.publish(self.channel, json.dumps(message))
+    
+    def subscribe(self, callback):
+        def handler(raw):
+            try:
+                callback(json.loads(raw["data"]))
+            except (TypeError, ValueError) as e:
+                print(f"Cache invalidation message error: {e}")
+        
+        self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: handler})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+    
+    def unsubscribe(self, callback):
+        # One listener per bus: dropping it is closing the subscription
+        self.close()
+    
+    def close(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+class CacheBackend(ABC):
+    """Byte store with per-key TTL (seconds; None means no expiry)"""
+    
+    name = "base"
+    
+    @abstractmethod
+    def get_many_with_ttl(self, keys: list) -> list:
+        """[(data or None, remaining seconds or None)] in key order"""
+        raise NotImplementedError
+    
+    def get(self, key: str):
+        return self.get_many_with_ttl([key])[0][0]
+    
+    @abstractmethod
+    def set(self, key: str, data: bytes, ttl: float = None, nx: bool = False) -> bool:
+        """Store a value; with nx, only if the key is absent. Returns whether it was written
+        
+        Raises ItemTooLarge when the backend cannot hold the value.
+        """
+    
+    def set_many(self, entries: list):
+        """Store (key, data, ttl) triples"""
+        for key, data, ttl in entries:
+            self.set(key, data, ttl)
+    
+    @abstractmethod
+    def delete(self, key: str) -> int:
+        """Remove a key; returns the number of keys removed"""
+    
+    @abstractmethod
+    def delete_if_equals(self, key: str, data: bytes) -> bool:
+        """Atomically delete a key if it still holds `data` (lock release)"""
+    
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Atomically increment an integer counter, creating it at 1"""
+    
+    @abstractmethod
+    def clear(self):
+        """Remove every key"""
+    
+    def make_invalidation_bus(self):
+        """Bus for L1 invalidations, or None if local copies cannot be kept coherent"""
+        bus = getattr(self, "_local_bus", None)
+        if bus is None:
+            bus = self._local_bus = LocalInvalidationBus()
+        return bus
+    
+    def close(self):
+        pass
+
+
+class RedisBackend(CacheBackend):
+    """Redis; batches go through one non-transactional pipeline"""
+    
+    name = "redis"
+    
+    def __init__(self, redis_client=None, redis_url: str = None):
+        if redis_client is None:
+            if redis is None:
+                raise ImportError("redis is not installed; use the memory or mmap cache backend")
+            redis_client = redis.from_url(redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        self.client = redis_client
+        self._release_lock = self.client.register_script(_RELEASE_LOCK)
+    
+    def get_many_with_ttl(self, keys: list) -> list:
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+            pipe.pttl(key)
+        replies = pipe.execute()
+        return [
+            (data or None, ttl_ms / 1000 if data and ttl_ms and ttl_ms > 0 else None)
+            for data, ttl_ms in zip(replies[::2], replies[1::2])
+        ]
+    
+    def set(self, key: str, data: bytes, ttl: float = None, nx: bool = False) -> bool:
+        px = int(ttl * 1000) if ttl is not None else None
+        return bool(self.client.set(key, data, px=px, nx=nx))
+    
+    def set_many(self, entries: list):
+        pipe = self.client.pipeline(transaction=False)
+        for key, data, ttl in entries:
+            pipe.set(key, data, px=int(ttl * 1000) if ttl is not None else None)
+        pipe.execute()
+    
+    def delete(self, key: str) -> int:
+        return self.client.delete(key)
+    
+    def delete_if_equals(self, key: str, data: bytes) -> bool:
+        return bool(self._release_lock(keys=[key], args=[data]))
+    
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(key))
+    
+    def clear(self):
+        self.client.flushdb()
+    
+    def make_invalidation_bus(self):
+        return RedisInvalidationBus(self.client)
+    
+    def close(self):
+        self.client.close()
+
+
+def _remaining(expires_at: float, now: float):
+    return None if expires_at == 0 else expires_at - now
+
+
+class MemoryBackend(CacheBackend):
+    """In-process store with LRU eviction; for tests and single-process nodes"""
+    
+    name = "memory"
+    
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at or 0, data)
+        self._lock = threading.Lock()
+    
+    def _live(self, key: str, now: float):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] and entry[0] <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+    
+    def get_many_with_ttl(self, keys: list) -> list:
+        now = time.time()
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self._live(key, now)
+                results.append((None, None) if entry is None else (entry[1], _remaining(entry[0], now)))
+        return results
+    
+    def _store(self, key: str, data: bytes, ttl: float):
+        self._data[key] = (time.time() + ttl if ttl is not None else 0, bytes(data))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+    
+    def set(self, key: str, data: bytes, ttl: float = None, nx: bool = False) -> bool:
+        with self._lock:
+            if nx and self._live(key, time.time()) is not None:
+                return False
+            self._store(key, data, ttl)
+            return True
+    
+    def set_many(self, entries: list):
+        with self._lock:
+            for key, data, ttl in entries:
+                self._store(key, data, ttl)
+    
+    def delete(self, key: str) -> int:
+        with self._lock:
+            return 1 if self._data.pop(key, None) is not None else 0
+    
+    def delete_if_equals(self, key: str, data: bytes) -> bool:
+        with self._lock:
+            entry = self._live(key, time.time())
+            if entry is None or entry[1] != data:
+                return False
+            del self._data[key]
+            return True
+    
+    def incr(self, key: str) -> int:
+        with self._lock:
+            entry = self._live(key, time.time())
+            value = int(entry[1]) + 1 if entry else 1
+            self._data[key] = (entry[0] if entry else 0, str(value).encode())
+            return value
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class MmapBackend(CacheBackend):
+    """Fixed-slot hash table in a memory-mapped file, shared by local processes
+    
+    Keys hash to a slot and probe linearly; every slot holds one key and
+    value of up to slot_size - 24 bytes, so size slots for the largest
+    frames cached (the file is sparse). Writers take an exclusive flock,
+    readers a shared one, so processes on the same host see each other's
+    writes with no network hop. When a probe window is full the entry with
+    the nearest expiry is evicted. Unix only (fcntl).
+    """
+    
+    name = "mmap"
+    
+    MAGIC = b"LCKV0001"
+    HEADER = struct.Struct("<8sII")
+    HEADER_SIZE = 64
+    SLOT = struct.Struct("<BxHIdQ")  # state, key_len, value_len, expires_at, key_hash
+    EMPTY, USED, DELETED = 0, 1, 2
+    
+    def __init__(self, path: str, slots: int = CACHE_MMAP_SLOTS, slot_size: int = CACHE_MMAP_SLOT_SIZE,
+                 max_probe: int = 32):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        
+        self.path = path
+        self.max_probe = max_probe
+        self._thread_lock = threading.RLock()  # flock does not exclude threads sharing an fd
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, self.HEADER_SIZE + slots * slot_size)  # sparse
+                os.pwrite(self._fd, self.HEADER.pack(self.MAGIC, slots, slot_size), 0)
+            magic, self.slots, self.slot_size = self.HEADER.unpack(os.pread(self._fd, self.HEADER.size, 0))
+            if magic != self.MAGIC:
+                raise ValueError(f"{path} is not a cache file")
+            if (self.slots, self.slot_size) != (slots, slot_size):
+                # Other processes may have it mapped; resizing means a new file
+                logger.warning(
+                    f"{path} keeps its layout of {self.slots} x {self.slot_size} byte slots "
+                    f"(configured {slots} x {slot_size}); delete it to apply the new size"
+                )
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        
+        self.max_item_size = self.slot_size - self.SLOT.size
+        self._mm = mmap.mmap(self._fd, self.HEADER_SIZE + self.slots * self.slot_size)
+    
+    # --- locking and slot access -------------------------------------------
+    
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _hash(key: bytes) -> int:
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+    
+    def _offset(self, index: int) -> int:
+        return self.HEADER_SIZE + index * self.slot_size
+    
+    def _probe(self, key_hash: int):
+        start = key_hash % self.slots
+        for i in range(min(self.max_probe, self.slots)):
+            index = (start + i) % self.slots
+            yield index, self.SLOT.unpack_from(self._mm, self._offset(index))
+    
+    def _find(self, key: bytes, key_hash: int, now: float):
+        """(slot index, value_len, expires_at) of a live key, else None"""
+        for index, (state, key_len, value_len, expires_at, slot_hash) in self._probe(key_hash):
+            if state == self.EMPTY:
+                return None
+            if state != self.USED or slot_hash != key_hash or key_len != len(key):
+                continue
+            offset = self._offset(index) + self.SLOT.size
+            if self._mm[offset:offset + key_len] != key:
+                continue
+            if expires_at and expires_at <= now:
+                return None
+            return index, value_len, expires_at
+        return None
+    
+    def _read(self, key: str, now: float):
+        raw = key.encode()
+        found = self._find(raw, self._hash(raw), now)
+        if found is None:
+            return None, None
+        index, value_len, expires_at = found
+        offset = self._offset(index) + self.SLOT.size + len(raw)
+        return bytes(self._mm[offset:offset + value_len]), _remaining(expires_at, now)
+    
+    def _write(self, key: str, data: bytes, ttl: float, nx: bool = False) -> bool:
+        raw = key.encode()
+        if len(raw) + len(data) > self.max_item_size:
+            raise ItemTooLarge(f"Cache item {key} is {len(raw) + len(data)} bytes; mmap slots hold {self.max_item_size}")
+        
+        now = time.time()
+        key_hash = self._hash(raw)
+        target = None
+        victim = None  # (expires_at, index) of the entry to evict if the window is full
+        for index, (state, key_len, _, expires_at, slot_hash) in self._probe(key_hash):
+            if state == self.USED and slot_hash == key_hash and key_len == len(raw):
+                offset = self._offset(index) + self.SLOT.size
+                if self._mm[offset:offset + key_len] == raw:
+                    if nx and not (expires_at and expires_at <= now):
+                        return False
+                    target = index
+                    break
+            reusable = state != self.USED or (expires_at and expires_at <= now)
+            if reusable and target is None:
+                target = index
+                if state == self.EMPTY:
+                    break  # the key cannot be further along the chain
+            elif state == self.USED:
+                rank = expires_at or float("inf")
+                if victim is None or rank < victim[0]:
+                    victim = (rank, index)
+        
+        if target is None:
+            target = victim[1]
+        
+        offset = self._offset(target)
+        expires_at = now + ttl if ttl is not None else 0.0
+        self._mm[offset + self.SLOT.size:offset + self.SLOT.size + len(raw) + len(data)] = raw + bytes(data)
+        self.SLOT.pack_into(self._mm, offset, self.USED, len(raw), len(data), expires_at, key_hash)
+        return True
+    
+    # --- CacheBackend -------------------------------------------------------
+    
+    def get_many_with_ttl(self, keys: list) -> list:
+        now = time.time()
+        with self._locked(exclusive=False):
+            return [self._read(key, now) for key in keys]
+    
+    def set(self, key: str, data: bytes, ttl: float = None, nx: bool = False) -> bool:
+        with self._locked(exclusive=True):
+            return self._write(key, data, ttl, nx)
+    
+    def set_many(self, entries: list):
+        with self._locked(exclusive=True):
+            for key, data, ttl in entries:
+                self._write(key, data, ttl)
+    
+    def _delete(self, key: str, data: bytes = None) -> int:
+        raw = key.encode()
+        found = self._find(raw, self._hash(raw), time.time())
+        if found is None:
+            return 0
+        index = found[0]
+        offset = self._offset(index)
+        if data is not None:
+            start = offset + self.SLOT.size + len(raw)
+            if self._mm[start:start + found[1]] != data:
+                return 0
+        self._mm[offset] = self.DELETED
+        return 1
+    
+    def delete(self, key: str) -> int:
+        with self._locked(exclusive=True):
+            return self._delete(key)
+    
+    def delete_if_equals(self, key: str, data: bytes) -> bool:
+        with self._locked(exclusive=True):
+            return bool(self._delete(key, data))
+    
+    def incr(self, key: str) -> int:
+        with self._locked(exclusive=True):
+            data, ttl = self._read(key, time.time())
+            value = int(data) + 1 if data else 1
+            self._write(key, str(value).encode(), ttl)
+            return value
+    
+    def clear(self):
+        with self._locked(exclusive=True):
+            for index in range(self.slots):
+                self._mm[self._offset(index)] = self.EMPTY
+    
+    def make_invalidation_bus(self):
+        # Other processes write straight into the shared file; a local L1
+        # would serve stale copies, so the manager reads through instead
+        return None
+    
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            os.close(self._fd)
+            self._mm = None
+
+
+def make_backend(name: str = None, redis_url: str = None, path: str = None) -> CacheBackend:
+    """Backend from CACHE_BACKEND (redis, memory or mmap)"""
+    name = name or CACHE_BACKEND
+    if name == "redis":
+        return RedisBackend(redis_url=redis_url)
+    if name == "memory":
+        return MemoryBackend()
+    if name == "mmap":
+        return MmapBackend(path or CACHE_MMAP_PATH)
+    raise ValueError(f"Unknown cache backend: {name}")
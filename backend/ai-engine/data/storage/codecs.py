@@ -0,0 +1,293 @@
+import pickle
+import time
+from datetime import date, datetime
+
+import msgpack
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from shared.models.market_data import BarArray, PRICE_FIELDS, default_symbols
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+# Two header bytes: codec, then compression
+CODEC_MSGPACK = b"M"
+CODEC_ARROW_FRAME = b"A"
+CODEC_ARROW_BARS = b"B"
+CODEC_ARROW_SERIES = b"S"
+CODEC_PICKLE = b"P"
+
+COMPRESSION_NONE = b"-"
+COMPRESSION_ZSTD = b"z"
+COMPRESSION_LZ4 = b"4"
+
+_EXT_DATETIME = 1
+_EXT_DATE = 2
+_EXT_TUPLE = 3
+_EXT_NDARRAY = 4
+_EXT_SET = 5
+_EXT_FROZENSET = 6
+
+# Column and schema metadata key of a Series stored as a one-column table
+_SERIES_COLUMN = "values"
+_SERIES_NAME = b"series_name"
+
+
+def _msgpack_default(value):
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, value.isoformat().encode())
+    if isinstance(value, date):
+        return msgpack.ExtType(_EXT_DATE, value.isoformat().encode())
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        # Raw buffer plus dtype and shape, so it decodes as the same array
+        if value.dtype.hasobject:
+            raise TypeError("Cannot encode object-dtype ndarray with msgpack")
+        payload = [value.dtype.str, list(value.shape), np.ascontiguousarray(value).tobytes()]
+        return msgpack.ExtType(_EXT_NDARRAY, _msgpack_pack(payload))
+    if isinstance(value, frozenset):
+        return msgpack.ExtType(_EXT_FROZENSET, _msgpack_pack(list(value)))
+    if isinstance(value, set):
+        return msgpack.ExtType(_EXT_SET, _msgpack_pack(list(value)))
+    if isinstance(value, tuple):
+        # An ext type rather than an array, so tuple dict keys stay hashable
+        return msgpack.ExtType(_EXT_TUPLE, _msgpack_pack(list(value)))
+    # strict_types hands subclasses (OrderedDict, str enums, ...) to us
+    if isinstance(value, str):
+        return str.__str__(value)  # str(StrEnum member) would give its qualified name
+    for base in (dict, list, bytes, int, float):
+        if isinstance(value, base):
+            return base(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} with msgpack")
+
+
+def _msgpack_pack(value) -> bytes:
+    return msgpack.packb(value, default=_msgpack_default, use_bin_type=True, strict_types=True)
+
+
+def _msgpack_unpack(data):
+    # Non-string keys are legitimate here, e.g. {0.95: var} confidence maps
+    return msgpack.unpackb(data, ext_hook=_msgpack_ext, raw=False, strict_map_key=False)
+
+
+def _msgpack_ext(code, data):
+    if code == _EXT_TUPLE:
+        return tuple(_msgpack_unpack(data))
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode())
+    if code == _EXT_NDARRAY:
+        dtype, shape, buffer = _msgpack_unpack(data)
+        # A writable copy, like the array that was stored
+        return np.frombuffer(buffer, dtype=np.dtype(dtype)).reshape(shape).copy()
+    if code == _EXT_SET:
+        return set(_msgpack_unpack(data))
+    if code == _EXT_FROZENSET:
+        return frozenset(_msgpack_unpack(data))
+    return msgpack.ExtType(code, data)
+
+
+def _arrow_bytes(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _arrow_table(data: bytes) -> pa.Table:
+    return pa.ipc.open_stream(pa.py_buffer(data)).read_all()
+
+
+def encode_frame(df: pd.DataFrame) -> bytes:
+    return _arrow_bytes(pa.Table.from_pandas(df))
+
+
+def decode_frame(data: bytes) -> pd.DataFrame:
+    return _arrow_table(data).to_pandas()
+
+
+def encode_series(series: pd.Series) -> bytes:
+    """A one-column table; the name (any msgpack value) goes in the metadata"""
+    table = pa.Table.from_pandas(series.to_frame(name=_SERIES_COLUMN))
+    metadata = {**table.schema.metadata, _SERIES_NAME: _msgpack_pack(series.name)}
+    return _arrow_bytes(table.replace_schema_metadata(metadata))
+
+
+def decode_series(data: bytes) -> pd.Series:
+    table = _arrow_table(data)
+    series = table.to_pandas()[_SERIES_COLUMN]
+    series.name = _msgpack_unpack(table.schema.metadata[_SERIES_NAME])
+    return series
+
+
+def encode_bars(bars: BarArray) -> bytes:
+    """Columns as stored, plus the symbol names the IDs refer to"""
+    columns = {"timestamps": bars.timestamps, "symbol_ids": bars.symbol_ids}
+    columns.update({field: getattr(bars, field) for field in PRICE_FIELDS})
+    table = pa.table(columns, metadata={"symbols": "\n".join(bars.symbols.names)})
+    return _arrow_bytes(table)
+
+
+def decode_bars(data: bytes, symbols=None) -> BarArray:
+    """Rebuild bars, remapping symbol IDs onto this process's symbol table"""
+    symbols = symbols if symbols is not None else default_symbols
+    table = _arrow_table(data)
+    names = table.schema.metadata[b"symbols"].decode().split("\n")
+    lookup = np.array([symbols.intern(name) for name in names], dtype=np.int32)
+    columns = {name: table.column(name).to_numpy() for name in table.column_names}
+    return BarArray(
+        columns["timestamps"],
+        lookup[columns["symbol_ids"]] if len(lookup) else columns["symbol_ids"],
+        symbols=symbols,
+        **{field: columns[field] for field in PRICE_FIELDS}
+    )
+
+
+class Serializer:
+    """Type-aware cache serialization
+    
+    DataFrames, Series and BarArrays go through Arrow IPC, everything else
+    through msgpack. Pickle is only used when explicitly allowed, since
+    unpickling data from a shared cache runs arbitrary code. Payloads above
+    `compress_threshold` bytes are compressed with zstd or lz4 when available.
+    
+    msgpack values keep their types: non-string dict keys, tuples (including
+    tuple keys), sets, frozensets and numeric ndarrays (dtype and shape)
+    round-trip as themselves. Anything else raises TypeError, or falls back
+    to pickle when that is allowed.
+    """
+    
+    def __init__(self, compression: str = "zstd", compress_threshold: int = 4096,
+                 allow_pickle: bool = False, level: int = 3):
+        self.compress_threshold = compress_threshold
+        self.allow_pickle = allow_pickle
+        
+        # Readers handle every installed algorithm, whatever this writer uses
+        self._compressor = zstandard.ZstdCompressor(level=level) if zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+        
+        self.compression = COMPRESSION_NONE
+        if compression == "zstd" and zstandard is not None:
+            self.compression = COMPRESSION_ZSTD
+        elif compression == "lz4" and lz4 is not None:
+            self.compression = COMPRESSION_LZ4
+        elif compression not in (None, "none", "zstd", "lz4"):
+            raise ValueError(f"Unknown compression: {compression}")
+    
+    def _encode(self, value):
+        if isinstance(value, pd.DataFrame):
+            return CODEC_ARROW_FRAME, encode_frame(value)
+        if isinstance(value, pd.Series):
+            return CODEC_ARROW_SERIES, encode_series(value)
+        if isinstance(value, BarArray):
+            return CODEC_ARROW_BARS, encode_bars(value)
+        try:
+            return CODEC_MSGPACK, _msgpack_pack(value)
+        except (TypeError, ValueError, OverflowError):
+            if not self.allow_pickle:
+                raise
+            return CODEC_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def dumps(self, value) -> bytes:
+        codec, payload = self._encode(value)
+        
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(payload) >= self.compress_threshold:
+            compression = self.compression
+            if compression == COMPRESSION_ZSTD:
+                payload = self._compressor.compress(payload)
+            else:
+                payload = lz4.frame.compress(payload)
+        
+        return codec + compression + payload
+    
+    def loads(self, data: bytes):
+        codec, compression, payload = data[:1], data[1:2], memoryview(data)[2:]
+        
+        if compression == COMPRESSION_ZSTD:
+            if zstandard is None:
+                raise ValueError("zstd-compressed cache entry but zstandard is not installed")
+            payload = self._decompressor.decompress(payload)
+        elif compression == COMPRESSION_LZ4:
+            if lz4 is None:
+                raise ValueError("lz4-compressed cache entry but lz4 is not installed")
+            payload = lz4.frame.decompress(payload)
+        elif compression != COMPRESSION_NONE:
+            raise ValueError(f"Unknown cache compression tag {compression!r}")
+        
+        if codec == CODEC_MSGPACK:
+            return _msgpack_unpack(payload)
+        if codec == CODEC_ARROW_FRAME:
+            return decode_frame(bytes(payload))
+        if codec == CODEC_ARROW_SERIES:
+            return decode_series(bytes(payload))
+        if codec == CODEC_ARROW_BARS:
+            return decode_bars(bytes(payload))
+        if codec == CODEC_PICKLE:
+            if not self.allow_pickle:
+                raise ValueError("Refusing to unpickle a cache entry (allow_pickle=False)")
+            return pickle.loads(payload)
+        raise ValueError(f"Unknown cache codec tag {codec!r}")
+
+
+def benchmark(rounds: int = 20) -> dict:
+    """Bytes and encode/decode latency per codec versus pickle"""
+    rng = np.random.default_rng(0)
+    n = 50000
+    index = pd.date_range("2026-01-01", periods=n, freq="5min", tz="UTC")
+    frame = pd.DataFrame({
+        "Open": rng.random(n), "High": rng.random(n), "Low": rng.random(n),
+        "Close": rng.random(n), "Volume": rng.random(n) * 1e6,
+        "symbol": np.repeat(["BTC-USD", "ETH-USD"], n // 2)
+    }, index=index)
+    samples = {
+        "signal": {"symbol": "BTC-USD", "action": "BUY", "confidence": 82.5,
+                   "strategy": "RSI Strategy", "reason": "RSI oversold at 24.10",
+                   "timestamp": datetime(2026, 1, 1, 12, 0)},
+        "quotes": {f"SYM{i}": {"price": float(p), "volume": int(v)}
+                   for i, (p, v) in enumerate(zip(rng.random(500) * 100, rng.integers(0, 10**6, 500)))},
+        "frame": frame,
+        "bars": BarArray.from_frame(frame)
+    }
+    serializers = {
+        "pickle": None,
+        "codec": Serializer(compression=None),
+        "codec+zstd": Serializer(compression="zstd"),
+        "codec+lz4": Serializer(compression="lz4")
+    }
+    
+    results = {}
+    for sample_name, value in samples.items():
+        for name, serializer in serializers.items():
+            dumps = (lambda v: pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL)) if serializer is None else serializer.dumps
+            loads = pickle.loads if serializer is None else serializer.loads
+            
+            start = time.perf_counter()
+            for _ in range(rounds):
+                data = dumps(value)
+            encode_ms = (time.perf_counter() - start) / rounds * 1000
+            start = time.perf_counter()
+            for _ in range(rounds):
+                loads(data)
+            decode_ms = (time.perf_counter() - start) / rounds * 1000
+            
+            results[(sample_name, name)] = {"bytes": len(data), "encode_ms": encode_ms, "decode_ms": decode_ms}
+            print(f"{sample_name:>7} {name:>10}: {len(data):>10,} B  "
+                  f"encode {encode_ms:8.3f} ms  decode {decode_ms:8.3f} ms")
+    
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,21 +1,90 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
+from sqlalchemy import (create_engine, Column, Integer, String, Float, DateTime, DDL, Index, event,
+                        select, insert, delete, bindparam, text, tuple_, func)
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from datetime import datetime, timedelta
+import io
+import threading
+import time
+import numpy as np
+import pandas as pd
 import os
 
+from shared.models.market_data import BarArray
+
 Base = declarative_base()
 
-class MarketData(Base):
-    """Market data storage model"""
-    __tablename__ = 'market_data'
+class BarColumns:
+    """Columns shared by the raw bar table and its rollups"""
     
-    id = Column(Integer, primary_key=True)
-    symbol = Column(String(20))
-    price = Column(Float)
+    # One row per bar: (symbol, timestamp) is the key, so re-ingesting is idempotent
+    symbol = Column(String(20), primary_key=True)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)  # bar open, naive UTC
+    price = Column(Float)  # close
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
     volume = Column(Float)
-    timestamp = Column(DateTime, default=datetime.utcnow)
     source = Column(String(50))
+    
+    # Range-partitioned on Postgres; a plain table elsewhere
+    __table_args__ = {'postgresql_partition_by': 'RANGE (timestamp)'}
+
+class MarketData(BarColumns, Base):
+    """Market data storage model (raw 5-minute bars)"""
+    __tablename__ = 'market_data'
+
+class MarketDataHourly(BarColumns, Base):
+    """Hourly rollup of market_data"""
+    __tablename__ = 'market_data_1h'
+
+class MarketDataDaily(BarColumns, Base):
+    """Daily rollup of market_data_1h"""
+    __tablename__ = 'market_data_1d'
+
+BAR_COLUMNS = ['symbol', 'timestamp', 'open', 'high', 'low', 'price', 'volume', 'source']
+
+# Stored resolutions, finest first: interval, table, Postgres partition size
+RAW_RESOLUTION = '5m'
+RESOLUTIONS = {
+    '5m': (timedelta(minutes=5), MarketData.__table__, 'month'),
+    '1h': (timedelta(hours=1), MarketDataHourly.__table__, 'year'),
+    '1d': (timedelta(days=1), MarketDataDaily.__table__, 'year')
+}
+
+# How long each resolution is kept (None = forever). Raw bars must outlive
+# the backfill lookback, or purged ranges would just be fetched again.
+DEFAULT_RETENTION = {
+    '5m': timedelta(days=90),
+    '1h': timedelta(days=730),
+    '1d': None
+}
+
+# Catch-all partition, so a write outside the managed ranges never fails
+for _interval, _table, _period in RESOLUTIONS.values():
+    event.listen(_table, 'after_create', DDL(
+        f'CREATE TABLE IF NOT EXISTS {_table.name}_default PARTITION OF {_table.name} DEFAULT'
+    ).execute_if(dialect='postgresql'))
+
+def _partition_for(ts: pd.Timestamp, period: str):
+    """(name suffix, lower, upper) of the partition holding ts"""
+    if period == 'month':
+        lower = pd.Timestamp(ts.year, ts.month, 1)
+        return f'p{ts.year:04d}{ts.month:02d}', lower, lower + pd.DateOffset(months=1)
+    lower = pd.Timestamp(ts.year, 1, 1)
+    return f'p{ts.year:04d}', lower, lower + pd.DateOffset(years=1)
+
+def _partition_upper(suffix: str):
+    """Upper bound of a partition from its name suffix (None if not ours)"""
+    digits = suffix[1:]
+    if not (suffix.startswith('p') and digits.isdigit()):
+        return None
+    if len(digits) == 6:
+        return pd.Timestamp(int(digits[:4]), int(digits[4:]), 1) + pd.DateOffset(months=1)
+    if len(digits) == 4:
+        return pd.Timestamp(int(digits), 1, 1) + pd.DateOffset(years=1)
+    return None
 
 class Signal(Base):
     """Trading signal storage model"""
@@ -26,19 +95,36 @@ class Signal(Base):
     action = Column(String(10))  # BUY, SELL, HOLD
     confidence = Column(Float)
     strategy = Column(String(50))
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    # The shared signals table (API migrations, models.signal) names it created_at
+    timestamp = Column('created_at', DateTime, default=datetime.utcnow)
     reason = Column(String(255))
+    
+    # Newest-first keyset pagination walks this index (same name as the API migration's)
+    __table_args__ = (
+        Index('ix_signals_created_at_id', 'created_at', 'id'),
+    )
+
+# What a signal feed row carries; no ORM objects are built for it
+SIGNAL_FEED_COLUMNS = [
+    Signal.id, Signal.symbol, Signal.action, Signal.confidence,
+    Signal.strategy, Signal.reason, Signal.timestamp.label('timestamp')
+]
 
 class DatabaseManager:
     """Manage database operations"""
     
-    def __init__(self, database_url=None):
+    def __init__(self, database_url=None, retention: dict = None):
         if database_url is None:
             database_url = os.getenv("DATABASE_URL", "sqlite:///./trading.db")
         
         self.engine = create_engine(database_url)
         self.Session = sessionmaker(bind=self.engine)
         Base.metadata.create_all(self.engine)
+        self.retention = {**DEFAULT_RETENTION, **(retention or {})}
+        self._partitions = set()
+        # Ranges written per resolution since the rollup job last drained them
+        self._dirty = {}
+        self._dirty_lock = threading.Lock()
     
     def save_signal(self, signal_data: dict):
         """Save a trading signal to database"""
@@ -59,4 +145,371 @@ class DatabaseManager:
         try:
             return session.query(Signal).order_by(Signal.timestamp.desc()).limit(limit).all()
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+    
+    def get_signal_rows(self, limit: int = 50, before: tuple = None, symbol: str = None) -> list:
+        """Newest signals as named rows, for polling dashboards
+        
+        Pages by keyset: pass the (timestamp, id) of the last row seen as
+        `before` to get the next page, which costs the same at any depth.
+        """
+        query = select(*SIGNAL_FEED_COLUMNS)
+        if symbol:
+            query = query.where(Signal.symbol == symbol)
+        if before is not None:
+            timestamp, signal_id = before
+            query = query.where(tuple_(Signal.timestamp, Signal.id) < tuple_(timestamp, signal_id))
+        query = query.order_by(Signal.timestamp.desc(), Signal.id.desc()).limit(limit)
+        
+        with self.engine.connect() as conn:
+            return conn.execute(query).all()
+    
+    def get_bar_timestamps(self, symbol: str, start: datetime = None, end: datetime = None) -> np.ndarray:
+        """Sorted bar times for a symbol as int64 epoch nanoseconds"""
+        table = MarketData.__table__
+        query = select(table.c.timestamp).where(table.c.symbol == symbol)
+        if start is not None:
+            query = query.where(table.c.timestamp >= start)
+        if end is not None:
+            query = query.where(table.c.timestamp <= end)
+        
+        with self.engine.connect() as conn:
+            times = conn.execute(query.order_by(table.c.timestamp)).scalars().all()
+        if not times:
+            return np.empty(0, dtype=np.int64)
+        return pd.DatetimeIndex(times).as_unit('ns').asi8
+    
+    @staticmethod
+    def _latest_per_key(bars):
+        """Drop repeated (symbol, timestamp) pairs, keeping the last one
+        
+        A single upsert statement may not touch the same row twice.
+        """
+        order = np.lexsort((np.arange(len(bars)), bars.timestamps, bars.symbol_ids))
+        sym, ts = bars.symbol_ids[order], bars.timestamps[order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (sym[1:] != sym[:-1]) | (ts[1:] != ts[:-1])
+        return bars[np.sort(order[last])]
+    
+    def _upsert_statement(self, table):
+        if self.engine.dialect.name != 'postgresql':
+            return None
+        stmt = postgresql.insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=['symbol', 'timestamp'],
+            set_={name: stmt.excluded[name] for name in BAR_COLUMNS[2:]}
+        )
+    
+    def ensure_partitions(self, resolution: str, start, end):
+        """Postgres: create the range partitions covering [start, end]"""
+        if self.engine.dialect.name != 'postgresql':
+            return
+        interval, table, period = RESOLUTIONS[resolution]
+        ts, end = pd.Timestamp(start), pd.Timestamp(end)
+        with self.engine.begin() as conn:
+            while ts <= end:
+                suffix, lower, upper = _partition_for(ts, period)
+                name = f'{table.name}_{suffix}'
+                if name not in self._partitions:
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table.name} "
+                        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+                    ))
+                    self._partitions.add(name)
+                ts = upper
+    
+    def _copy_bars(self, table, rows) -> int:
+        """Postgres: COPY into a temp table, then one INSERT ... ON CONFLICT"""
+        frame = pd.DataFrame(rows, columns=BAR_COLUMNS)
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False, header=False, date_format='%Y-%m-%d %H:%M:%S.%f')
+        buffer.seek(0)
+        
+        updates = ', '.join(f'{name} = EXCLUDED.{name}' for name in BAR_COLUMNS[2:])
+        columns = ', '.join(BAR_COLUMNS)
+        stage = f'{table.name}_stage'
+        raw = self.engine.raw_connection()
+        try:
+            with raw.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TEMP TABLE {stage} '
+                    f'(LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP'
+                )
+                cursor.copy_expert(
+                    f'COPY {stage} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer
+                )
+                cursor.execute(
+                    f'INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {stage} '
+                    f'ON CONFLICT (symbol, timestamp) DO UPDATE SET {updates}'
+                )
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+        return len(rows)
+    
+    def ingest_bars(self, bars, source: str = 'yfinance', batch_size: int = 50000,
+                    use_copy: bool = True, resolution: str = RAW_RESOLUTION) -> int:
+        """Bulk upsert bars keyed by (symbol, timestamp); returns rows written
+        
+        Postgres goes through COPY (use_copy) or a batched executemany upsert,
+        SQLite through a driver-level executemany with one transaction per
+        batch. Existing bars are overwritten, so re-running an ingest is safe.
+        """
+        if not len(bars):
+            return 0
+        
+        bars = self._latest_per_key(bars)
+        table = RESOLUTIONS[resolution][1]
+        dialect = self.engine.dialect.name
+        self.mark_dirty(resolution, pd.Timestamp(int(bars.timestamps.min())),
+                        pd.Timestamp(int(bars.timestamps.max())), bars.symbol_names().tolist())
+        
+        # Column-wise conversion; no per-row pandas or ORM work
+        names = bars.symbol_names().tolist()
+        times = pd.to_datetime(bars.timestamps, unit='ns').to_pydatetime().tolist()  # naive UTC
+        rows = list(zip(
+            names, times, bars.open.tolist(), bars.high.tolist(), bars.low.tolist(),
+            bars.close.tolist(), bars.volume.tolist(), [source] * len(bars)
+        ))
+        
+        if dialect == 'postgresql':
+            self.ensure_partitions(resolution, pd.Timestamp(int(bars.timestamps.min())),
+                                   pd.Timestamp(int(bars.timestamps.max())))
+            if use_copy:
+                written = 0
+                for start in range(0, len(rows), batch_size):
+                    written += self._copy_bars(table, rows[start:start + batch_size])
+                return written
+        
+        if dialect == 'sqlite':
+            # Straight to the driver: SQLAlchemy's per-row DateTime processing
+            # dominates otherwise. Same text format SQLAlchemy stores.
+            stamps = np.char.replace(np.datetime_as_string(bars.timestamps.astype('datetime64[ns]'), unit='us'), 'T', ' ')
+            rows = [(row[0], stamp) + row[2:] for row, stamp in zip(rows, stamps.tolist())]
+            updates = ', '.join(f'{name} = excluded.{name}' for name in BAR_COLUMNS[2:])
+            sql = (
+                f"INSERT INTO {table.name} ({', '.join(BAR_COLUMNS)}) VALUES ({', '.join('?' * len(BAR_COLUMNS))}) "
+                f"ON CONFLICT (symbol, timestamp) DO UPDATE SET {updates}"
+            )
+            for start in range(0, len(rows), batch_size):
+                with self.engine.begin() as conn:
+                    conn.exec_driver_sql(sql, rows[start:start + batch_size])
+            return len(rows)
+        
+        stmt = self._upsert_statement(table)
+        replace = None
+        if stmt is None:
+            # No portable upsert: delete the keys being written, then insert
+            stmt = insert(table)
+            replace = delete(table).where(
+                table.c.symbol == bindparam('key_symbol'),
+                table.c.timestamp == bindparam('key_timestamp')
+            )
+        
+        written = 0
+        for start in range(0, len(rows), batch_size):
+            batch = [dict(zip(BAR_COLUMNS, row)) for row in rows[start:start + batch_size]]
+            with self.engine.begin() as conn:
+                if replace is not None:
+                    conn.execute(replace, [{'key_symbol': row['symbol'], 'key_timestamp': row['timestamp']}
+                                           for row in batch])
+                conn.execute(stmt, batch)
+            written += len(batch)
+        return written
+    
+    def mark_dirty(self, resolution: str, start, end, symbols):
+        """Record that bars in [start, end] were written for these symbols"""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        with self._dirty_lock:
+            previous = self._dirty.get(resolution)
+            if previous is not None:
+                start, end = min(start, previous[0]), max(end, previous[1])
+                symbols = previous[2] | set(symbols)
+            self._dirty[resolution] = (start, end, set(symbols))
+    
+    def take_dirty(self, resolution: str):
+        """(start, end, symbols) written since the last call, or None"""
+        with self._dirty_lock:
+            return self._dirty.pop(resolution, None)
+    
+    def save_bars(self, bars, source: str = 'yfinance') -> int:
+        """Store collected bars (idempotent upsert); returns the number written"""
+        return self.ingest_bars(bars, source)
+    
+    def load_bars(self, start: datetime, end: datetime, symbols: list = None,
+                  resolution: str = RAW_RESOLUTION) -> BarArray:
+        """Stored bars with start <= timestamp < end, ordered by (symbol, timestamp)"""
+        table = RESOLUTIONS[resolution][1]
+        query = select(
+            table.c.symbol, table.c.timestamp, table.c.open, table.c.high,
+            table.c.low, table.c.price, table.c.volume
+        ).where(table.c.timestamp >= start, table.c.timestamp < end)
+        if symbols:
+            query = query.where(table.c.symbol.in_(list(symbols)))
+        
+        with self.engine.connect() as conn:
+            rows = conn.execute(query.order_by(table.c.symbol, table.c.timestamp)).all()
+        if not rows:
+            return BarArray.empty()
+        
+        names, times, *prices = zip(*rows)
+        frame = pd.DataFrame(
+            dict(zip(['Open', 'High', 'Low', 'Close', 'Volume'], prices), symbol=names),
+            index=pd.DatetimeIndex(times)
+        )
+        # A bar with a missing field comes back as NaN rather than None
+        return BarArray.from_frame(frame.astype({column: float for column in ['Open', 'High', 'Low', 'Close', 'Volume']}))
+    
+    def bar_extents(self, resolution: str, start: datetime = None, end: datetime = None,
+                    symbols: list = None) -> dict:
+        """{symbol: (first, last)} bar times stored at a resolution within [start, end)"""
+        table = RESOLUTIONS[resolution][1]
+        query = select(table.c.symbol, func.min(table.c.timestamp), func.max(table.c.timestamp))
+        if start is not None:
+            query = query.where(table.c.timestamp >= start)
+        if end is not None:
+            query = query.where(table.c.timestamp < end)
+        if symbols:
+            query = query.where(table.c.symbol.in_(list(symbols)))
+        
+        with self.engine.connect() as conn:
+            rows = conn.execute(query.group_by(table.c.symbol)).all()
+        return {symbol: (pd.Timestamp(first), pd.Timestamp(last)) for symbol, first, last in rows}
+    
+    def choose_resolution(self, start: datetime, end: datetime, min_bars: int = 300,
+                          symbols: list = None) -> str:
+        """Coarsest stored resolution that covers the range and gives min_bars
+        
+        A resolution covers the range when, for every symbol stored at any
+        resolution, its bars reach as far back and (within two buckets, as
+        rollups only hold completed ones) as far forward as the data stored
+        anywhere. When none gives enough bars the finest covering one wins;
+        when none covers, the one spanning the most time.
+        """
+        extents = {name: self.bar_extents(name, start, end, symbols) for name in RESOLUTIONS}
+        stored = {}
+        for found in extents.values():
+            for symbol, (first, last) in found.items():
+                if symbol in stored:
+                    first, last = min(first, stored[symbol][0]), max(last, stored[symbol][1])
+                stored[symbol] = (first, last)
+        if not stored:
+            return RAW_RESOLUTION
+        
+        def covers(name):
+            interval = RESOLUTIONS[name][0]
+            for symbol, (first, last) in stored.items():
+                own = extents[name].get(symbol)
+                if own is None or own[0] > first.ceil(interval) or own[1] < last - 2 * interval:
+                    return False
+            return True
+        
+        covering = [name for name in RESOLUTIONS if covers(name)]
+        if not covering:
+            return max(RESOLUTIONS, key=lambda name: sum(
+                (last - first for first, last in extents[name].values()), pd.Timedelta(0)
+            ))
+        span = end - start
+        for name in reversed(covering):
+            if span / RESOLUTIONS[name][0] >= min_bars:
+                return name
+        return covering[0]
+    
+    def get_bars(self, start: datetime, end: datetime, symbols: list = None,
+                 min_bars: int = 300) -> tuple:
+        """(resolution, bars) for a range, read from the coarsest adequate table"""
+        resolution = self.choose_resolution(start, end, min_bars, symbols)
+        return resolution, self.load_bars(start, end, symbols, resolution)
+    
+    def purge_before(self, resolution: str, cutoff: datetime) -> int:
+        """Delete bars older than cutoff; returns rows deleted
+        
+        On Postgres, partitions that lie entirely before cutoff are dropped
+        instead of deleted row by row.
+        """
+        table = RESOLUTIONS[resolution][1]
+        dropped = 0
+        with self.engine.begin() as conn:
+            if self.engine.dialect.name == 'postgresql':
+                partitions = conn.execute(text(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE parent.relname = :table"
+                ), {'table': table.name}).scalars().all()
+                for name in partitions:
+                    upper = _partition_upper(name[len(table.name) + 1:])
+                    if upper is not None and upper <= pd.Timestamp(cutoff):
+                        conn.execute(text(f'DROP TABLE IF EXISTS {name}'))
+                        self._partitions.discard(name)
+                        dropped += 1
+            
+            # Rows left in partially expired partitions (or in a plain table)
+            deleted = conn.execute(delete(table).where(table.c.timestamp < cutoff)).rowcount
+        
+        if dropped:
+            print(f"Dropped {dropped} expired partitions of {table.name}")
+        return deleted
+
+
+def benchmark_signal_reads(n: int = 100000, limit: int = 50, rounds: int = 50,
+                           database_url: str = 'sqlite://') -> dict:
+    """Recent-signal reads: ORM objects to dicts versus Core named rows"""
+    db = DatabaseManager(database_url)
+    rng = np.random.default_rng(0)
+    start = datetime(2026, 1, 1)
+    with db.engine.begin() as conn:
+        conn.execute(insert(Signal), [
+            {'symbol': f'SYM{i % 50}', 'action': ('BUY', 'SELL', 'HOLD')[i % 3],
+             'confidence': float(c), 'strategy': 'RSI Strategy', 'reason': 'benchmark',
+             'timestamp': start + timedelta(seconds=i)}
+            for i, c in enumerate(rng.random(n) * 100)
+        ])
+    
+    def orm_page():
+        return [
+            {'id': s.id, 'symbol': s.symbol, 'action': s.action, 'confidence': s.confidence,
+             'strategy': s.strategy, 'reason': s.reason, 'timestamp': s.timestamp}
+            for s in db.get_recent_signals(limit)
+        ]
+    
+    def core_page():
+        return [row._asdict() for row in db.get_signal_rows(limit)]
+    
+    # One page halfway down the history, as a scrolled-back dashboard asks for
+    depth = n // 2
+    session = db.Session()
+    middle = session.query(Signal).order_by(Signal.timestamp.desc(), Signal.id.desc()).offset(depth - 1).first()
+    cursor = (middle.timestamp, middle.id)
+    
+    def orm_offset_page():
+        return [
+            {'id': s.id, 'symbol': s.symbol, 'action': s.action, 'confidence': s.confidence,
+             'strategy': s.strategy, 'reason': s.reason, 'timestamp': s.timestamp}
+            for s in session.query(Signal).order_by(Signal.timestamp.desc(), Signal.id.desc())
+            .offset(depth).limit(limit)
+        ]
+    
+    def core_keyset_page():
+        return [row._asdict() for row in db.get_signal_rows(limit, cursor)]
+    
+    assert orm_offset_page() == core_keyset_page()
+    
+    results = {}
+    for name, fn in [('orm_recent', orm_page), ('core_recent', core_page),
+                     ('orm_offset_deep', orm_offset_page), ('core_keyset_deep', core_keyset_page)]:
+        fn()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        results[name] = (time.perf_counter() - started) / rounds * 1000
+        print(f"{name:>18}: {results[name]:8.3f} ms")
+    session.close()
+    return results
+
+
+if __name__ == '__main__':
+    benchmark_signal_reads()
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from .database import RESOLUTIONS
+
+# Each rollup reads the next finer stored resolution
+ROLLUPS = [("5m", "1h"), ("1h", "1d")]
+
+
+class RollupJob:
+    """Compact stored bars into hourly and daily rollups, then apply retention
+    
+    Each run re-aggregates the completed buckets from the oldest one the
+    target is missing (its last stored bucket, or the first source bar for a
+    symbol it does not cover yet), at least the last `lookback`, plus any
+    older range the store reports as written since the previous run, so
+    backfilled history reaches the rollups before retention purges it. The
+    upserts make re-running a bucket harmless.
+    """
+    
+    def __init__(self, db, lookback: timedelta = timedelta(days=3)):
+        self.db = db
+        self.lookback = lookback
+    
+    def rollup(self, source: str, target: str, start: datetime, end: datetime,
+               symbols: list = None) -> int:
+        """Aggregate `source` bars in [start, end) into `target`; returns bars written"""
+        interval = RESOLUTIONS[target][0]
+        bars = self.db.load_bars(start, end, symbols, resolution=source)
+        return self.db.ingest_bars(bars.resample(interval), source="rollup", resolution=target)
+    
+    def catch_up_start(self, source: str, target: str):
+        """Oldest source bar time the target may not hold yet (None if nothing stored)"""
+        interval = RESOLUTIONS[target][0]
+        stored = self.db.bar_extents(source)
+        rolled = self.db.bar_extents(target)
+        starts = []
+        for symbol, (first, _) in stored.items():
+            own = rolled.get(symbol)
+            behind = own is None or own[0] > first.ceil(interval)
+            starts.append(first if behind else own[1])
+        return min(starts) if starts else None
+    
+    def run(self, now: datetime = None, lookback: timedelta = None) -> dict:
+        """Roll up completed buckets, then purge expired bars; returns counts per resolution"""
+        now = now or datetime.utcnow()
+        lookback = lookback or self.lookback
+        
+        result = {}
+        for source, target in ROLLUPS:
+            interval = pd.Timedelta(RESOLUTIONS[target][0])
+            # Only whole buckets: a partial one would be stored as if complete
+            end = pd.Timestamp(now).floor(interval)
+            start = pd.Timestamp(now - lookback)
+            caught_up = self.catch_up_start(source, target)
+            if caught_up is not None:
+                start = min(start, caught_up)
+            start = start.floor(interval)
+            
+            dirty = self.db.take_dirty(source)
+            try:
+                written = self.rollup(source, target, start.to_pydatetime(), end.to_pydatetime())
+                if dirty is not None:
+                    first, last, symbols = dirty
+                    # Late writes behind the main range; the rest is covered above
+                    first = first.floor(interval)
+                    last = min((last + RESOLUTIONS[source][0]).ceil(interval), start)
+                    if first < last:
+                        written += self.rollup(source, target, first.to_pydatetime(),
+                                               last.to_pydatetime(), sorted(symbols))
+            except Exception:
+                if dirty is not None:
+                    self.db.mark_dirty(source, *dirty)
+                raise
+            result[f"rolled_{target}"] = written
+        
+        for resolution, keep in self.db.retention.items():
+            if keep is not None:
+                result[f"purged_{resolution}"] = self.db.purge_before(resolution, now - keep)
+        return result
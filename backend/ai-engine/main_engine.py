@@ -5,19 +5,31 @@ Main AI Trading Engine - Runs 24/7 market analysis
 
 import schedule
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
+import numpy as np
+import pandas as pd
 
-from config.settings import AI_UPDATE_INTERVAL
+from config.settings import (AI_UPDATE_INTERVAL, RISK_BATCH_TIME, BAR_RETENTION_DAYS, MARKET_SNAPSHOT_PATH,
+                             SOCIAL_POSTS_PATH)
 from data.collectors.crypto_collector import CryptoCollector
-from analysis.technical.indicators import calculate_indicators
+from data.storage.database import DatabaseManager
+from data.storage.backfill import BackfillScheduler
+from data.storage.rollup import RollupJob
+from analysis.technical.indicators import calculate_indicators, latest_indicators
+from analysis.technical.indicator_snapshot import write_indicator_snapshots
 from strategies.rsi_strategy import RSIStrategy
+from analysis.risk.risk_batch import PortfolioRiskBatch
+from analysis.risk.portfolio_risk import default_correlation_cache
+from analysis.sentiment.social_analyzer import FilePostSource, SocialMediaAnalyzer
+from utils.validators import Validators
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from config.settings import DATABASE_URL
 from models.base import Base
 from models.signal import Signal
+from shared.models.market_snapshot import MarketSnapshot
 
 # Setup logging
 logging.basicConfig(
@@ -38,6 +50,25 @@ class AIEngine:
         self.engine = create_engine(DATABASE_URL)
         Base.metadata.create_all(self.engine)
         self.SessionLocal = sessionmaker(bind=self.engine)
+        self.risk_batch = PortfolioRiskBatch(self.engine)
+        
+        # Stored bar history; created after the engine's tables, since the
+        # storage module has its own legacy signals model
+        self.bar_store = DatabaseManager(DATABASE_URL, retention={
+            resolution: timedelta(days=days) if days else None
+            for resolution, days in BAR_RETENTION_DAYS.items()
+        })
+        self.backfill = BackfillScheduler(self.bar_store, self.crypto_collector.symbols)
+        self.crypto_collector.backfill = self.backfill
+        self.rollup = RollupJob(self.bar_store)
+        
+        # Latest bars and indicators for API workers on this host
+        self.market_snapshot = MarketSnapshot(MARKET_SNAPSHOT_PATH, writer=True)
+        
+        # Streaming social sentiment, when a post feed is configured
+        self.social_analyzer = SocialMediaAnalyzer(
+            source=FilePostSource(SOCIAL_POSTS_PATH) if SOCIAL_POSTS_PATH else None
+        )
         
         logger.info("AI Engine initialized")
     
@@ -47,10 +78,25 @@ class AIEngine:
             logger.info("Starting market analysis...")
             
             # 1. Collect market data
-            market_data = self.crypto_collector.collect()
+            bars = self.crypto_collector.collect_bars()
+            self.save_bars(bars)
+            if len(bars):
+                # Correlations cached for the previous bar are stale from here on
+                default_correlation_cache.on_bar_close(self.backfill.interval, int(bars.timestamps.max()))
+            market_data = bars.to_frame() if len(bars) else pd.DataFrame()
+            
+            # Drop only the bad bars; a symbol keeps its valid history
+            if not market_data.empty:
+                keep = Validators.usable_rows(market_data)
+                if not keep.all():
+                    dropped = market_data.loc[~keep, 'symbol'].astype(str).value_counts().to_dict()
+                    logger.warning(f"Dropping invalid bars per symbol: {dropped}")
+                    market_data = market_data[keep]
+                    bars = bars[keep]  # to_frame() keeps the bar order
             
             # 2. Calculate indicators
             indicators = calculate_indicators(market_data)
+            self.publish_snapshot(bars, market_data)
             
             # 3. Run strategies
             signals = []
@@ -64,10 +110,37 @@ class AIEngine:
                 self.process_signals(signals)
             
             logger.info(f"Analysis complete. Generated {len(signals)} signals")
-            
+        
         except Exception as e:
             logger.error(f"Error in market analysis: {e}")
     
+    def save_bars(self, bars):
+        """Store the cycle's bars; a storage failure must not cost the analysis"""
+        try:
+            self.bar_store.save_bars(bars)
+        except Exception as e:
+            # The backfill scan refetches whatever did not get stored
+            logger.error(f"Error saving market bars: {e}")
+    
+    def publish_snapshot(self, bars, market_data):
+        """Share the latest valid bars and per-symbol indicators with the API"""
+        if market_data.empty:
+            return
+        valid = np.isin(bars.symbol_names(), market_data['symbol'].unique().astype(str))
+        bars = bars[valid]
+        latest = latest_indicators(market_data)
+        
+        try:
+            self.market_snapshot.publish(bars, latest)
+        except Exception as e:
+            logger.error(f"Error publishing market snapshot: {e}")
+        
+        # Durable copy for dashboards: one bulk upsert per cycle
+        try:
+            write_indicator_snapshots(self.engine, latest, bars, self.backfill.interval)
+        except Exception as e:
+            logger.error(f"Error saving indicator snapshots: {e}")
+    
     def process_signals(self, signals):
         """Process generated trading signals"""
         session = self.SessionLocal()
@@ -104,12 +177,35 @@ class AIEngine:
         finally:
             session.close()
     
+    def run_risk_batch(self):
+        """Nightly per-user portfolio risk snapshot"""
+        try:
+            logger.info("Starting portfolio risk batch...")
+            self.risk_batch.run()
+        except Exception as e:
+            logger.error(f"Error in portfolio risk batch: {e}")
+    
+    def run_rollup(self):
+        """Hourly bar rollups and retention"""
+        try:
+            result = self.rollup.run()
+            logger.info(f"Bar rollup complete: {result}")
+        except Exception as e:
+            logger.error(f"Error in bar rollup: {e}")
+    
     def run(self):
         """Run the engine continuously"""
         logger.info("Starting AI Engine in 24/7 mode")
         
         # Schedule analysis
         schedule.every(AI_UPDATE_INTERVAL).seconds.do(self.analyze_markets)
+        schedule.every().day.at(RISK_BATCH_TIME).do(self.run_risk_batch)
+        schedule.every().hour.do(self.run_rollup)
+        
+        # Refill missing stored bars in the background
+        self.backfill.start()
+        if self.social_analyzer.source is not None:
+            self.social_analyzer.start()
         
         # Run immediately first time
         self.analyze_markets()
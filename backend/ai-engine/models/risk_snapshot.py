@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, Float, DateTime
+from sqlalchemy.sql import func
+from models.base import Base
+
+
+class PortfolioRiskSnapshot(Base):
+    __tablename__ = "portfolio_risk_snapshots"
+
+    # One row per user, replaced by the nightly risk batch
+    user_id = Column(Integer, primary_key=True)
+
+    total_value = Column(Float, nullable=False)
+    position_count = Column(Integer, nullable=False)
+
+    # Risk metrics (annualized volatility/Sharpe, 1-period historical VaR)
+    volatility = Column(Float)
+    var_95 = Column(Float)
+    var_99 = Column(Float)
+    sharpe_ratio = Column(Float)
+    concentration = Column(Float)  # Herfindahl index of position weights
+    max_weight = Column(Float)
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,5 +1,6 @@
+import numpy as np
 import pandas as pd
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 class Validators:
     """Data validation utilities"""
@@ -43,4 +44,135 @@ class Validators:
     @staticmethod
     def validate_price(price: float) -> bool:
         """Validate price value"""
-        return isinstance(price, (int, float)) and price > 0
\ No newline at end of file
+        return isinstance(price, (int, float)) and price > 0
+    
+    @staticmethod
+    def _row_checks(data: pd.DataFrame, group_col: str, time_col: str,
+                    expected_interval: pd.Timedelta = None):
+        """Per-row problem masks shared by the batch report and the row filter
+        
+        Returns (symbols, idx, masks) with idx mapping each row to its symbol,
+        or None when OHLC columns are missing. Duplicate-timestamp masks flag
+        every copy but the last one in row order.
+        """
+        n = len(data)
+        keys = data[group_col].to_numpy() if group_col in data.columns else np.zeros(n, dtype=int)
+        symbols, idx = np.unique(keys.astype(str), return_inverse=True)
+        
+        required_columns = ['Open', 'High', 'Low', 'Close']
+        if not all(col in data.columns for col in required_columns):
+            return symbols, idx, None
+        
+        prices = data[required_columns].to_numpy(dtype=np.float64)
+        o, h, l, c = prices.T
+        
+        masks = {'nan_values': np.isnan(prices).any(axis=1)}
+        with np.errstate(invalid='ignore'):
+            masks['non_positive_prices'] = (prices <= 0).any(axis=1)
+            masks['ohlc_violations'] = (h < np.maximum(np.maximum(o, c), l)) | (l > np.minimum(np.minimum(o, c), h))
+        
+        # Timestamps as naive-UTC int64 ns (asi8 avoids the tz-aware cast warning),
+        # sorted by (symbol, time) once so neighbours can be compared
+        times = pd.DatetimeIndex(pd.to_datetime(data[time_col] if time_col else data.index))
+        if times.tz is not None:
+            times = times.tz_convert(None)
+        ts = times.as_unit('ns').asi8
+        order = np.lexsort((ts, idx))
+        sorted_idx, sorted_ts = idx[order], ts[order]
+        same = sorted_idx[1:] == sorted_idx[:-1]
+        delta = np.diff(sorted_ts)
+        
+        # lexsort is stable, so within equal timestamps the later row sorts last
+        duplicates = np.zeros(n, dtype=bool)
+        duplicates[order[:-1]] = same & (delta == 0)
+        masks['duplicate_timestamps'] = duplicates
+        
+        if expected_interval is not None:
+            limit = np.full(len(symbols), pd.Timedelta(expected_interval).value * 1.5)
+        else:
+            positive = same & (delta > 0)
+            medians = pd.Series(delta[positive]).groupby(sorted_idx[1:][positive]).median()
+            limit = medians.reindex(range(len(symbols))).to_numpy() * 1.5
+        
+        gaps = np.zeros(n, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            gaps[order[1:]] = same & (delta > limit[sorted_idx[1:]])
+        masks['timestamp_gaps'] = gaps
+        return symbols, idx, masks
+    
+    @staticmethod
+    def validate_market_data_batch(data: pd.DataFrame, group_col: str = 'symbol',
+                                   time_col: str = None,
+                                   expected_interval: pd.Timedelta = None) -> pd.DataFrame:
+        """Per-symbol validation report, computed with vectorized checks
+        
+        Counts non-positive prices, OHLC ordering violations, NaNs, duplicate
+        timestamps and timestamp gaps (larger than 1.5x the expected or median
+        bar interval). `is_valid` marks the symbols that can be used as-is.
+        """
+        columns = ['rows', 'non_positive_prices', 'ohlc_violations', 'nan_values',
+                   'duplicate_timestamps', 'timestamp_gaps', 'is_valid']
+        if data.empty:
+            return pd.DataFrame(columns=columns)
+        
+        symbols, idx, masks = Validators._row_checks(data, group_col, time_col, expected_interval)
+        
+        def per_symbol(mask) -> np.ndarray:
+            return np.bincount(idx, weights=mask, minlength=len(symbols)).astype(int)
+        
+        if masks is None:
+            report = pd.DataFrame(0, index=symbols, columns=columns[:-1])
+            report['rows'] = per_symbol(np.ones(len(data)))
+            report['is_valid'] = False
+            return report
+        
+        report = pd.DataFrame({'rows': per_symbol(np.ones(len(data)))}, index=symbols)
+        for column in columns[1:-1]:
+            report[column] = per_symbol(masks[column])
+        
+        # Gaps are reported but do not by themselves disqualify a symbol
+        report['is_valid'] = (report[columns[1:5]] == 0).all(axis=1)
+        return report
+    
+    @staticmethod
+    def usable_rows(data: pd.DataFrame, group_col: str = 'symbol', time_col: str = None) -> np.ndarray:
+        """Bool mask of rows fit for analysis
+        
+        Drops only the offending bars (NaN or non-positive prices, OHLC
+        violations, all but the last copy of a duplicated timestamp), so one
+        bad bar no longer costs the whole symbol. Gaps are kept.
+        """
+        if data.empty:
+            return np.zeros(0, dtype=bool)
+        _, _, masks = Validators._row_checks(data, group_col, time_col)
+        if masks is None:
+            return np.zeros(len(data), dtype=bool)
+        return ~(masks['nan_values'] | masks['non_positive_prices']
+                 | masks['ohlc_violations'] | masks['duplicate_timestamps'])
+    
+    @staticmethod
+    def validate_signals_batch(signals: List[Dict[str, Any]]) -> np.ndarray:
+        """Vectorized validate_signal over many signals; returns a bool per signal"""
+        if not signals:
+            return np.zeros(0, dtype=bool)
+        
+        required_fields = ['symbol', 'action', 'confidence', 'strategy']
+        frame = pd.DataFrame.from_records(signals)
+        for field in required_fields:
+            if field not in frame.columns:
+                return np.zeros(len(signals), dtype=bool)
+        
+        has_fields = np.array([all(f in s for f in required_fields) for s in signals])
+        
+        valid_actions = ['BUY', 'SELL', 'HOLD', 'STRONG_BUY', 'STRONG_SELL']
+        action_ok = frame['action'].isin(valid_actions).to_numpy()
+        
+        confidence = frame['confidence']
+        numeric = np.array([isinstance(s['confidence'], (int, float)) if 'confidence' in s else False
+                            for s in signals])
+        values = pd.to_numeric(confidence.where(numeric), errors='coerce').to_numpy(dtype=np.float64)
+        with np.errstate(invalid='ignore'):
+            # Written as "not out of range" so NaN behaves like validate_signal
+            confidence_ok = numeric & ~(values < 0) & ~(values > 100)
+        
+        return has_fields & action_ok & confidence_ok
\ No newline at end of file
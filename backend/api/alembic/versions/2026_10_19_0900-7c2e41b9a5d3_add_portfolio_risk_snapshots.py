@@ -0,0 +1,39 @@
+"""Add portfolio risk snapshots
+
+Revision ID: 7c2e41b9a5d3
+Revises: d93805df4817
+Create Date: 2026-10-19 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e41b9a5d3'
+down_revision: Union[str, None] = 'd93805df4817'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('portfolio_risk_snapshots',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_value', sa.Float(), nullable=False),
+    sa.Column('position_count', sa.Integer(), nullable=False),
+    sa.Column('volatility', sa.Float(), nullable=True),
+    sa.Column('var_95', sa.Float(), nullable=True),
+    sa.Column('var_99', sa.Float(), nullable=True),
+    sa.Column('sharpe_ratio', sa.Float(), nullable=True),
+    sa.Column('concentration', sa.Float(), nullable=True),
+    sa.Column('max_weight', sa.Float(), nullable=True),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('portfolio_risk_snapshots')
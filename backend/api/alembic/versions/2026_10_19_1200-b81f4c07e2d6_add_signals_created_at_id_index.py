@@ -0,0 +1,26 @@
+"""Add signals (created_at, id) index
+
+Revision ID: b81f4c07e2d6
+Revises: 7c2e41b9a5d3
+Create Date: 2026-10-19 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4c07e2d6'
+down_revision: Union[str, None] = '7c2e41b9a5d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_signals_created_at_id', 'signals', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_signals_created_at_id', table_name='signals')
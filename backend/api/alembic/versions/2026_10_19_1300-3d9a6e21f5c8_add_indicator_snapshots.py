@@ -0,0 +1,42 @@
+"""Add indicator snapshots
+
+Revision ID: 3d9a6e21f5c8
+Revises: b81f4c07e2d6
+Create Date: 2026-10-19 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9a6e21f5c8'
+down_revision: Union[str, None] = 'b81f4c07e2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('indicator_snapshots',
+    sa.Column('interval', sa.String(length=10), nullable=False),
+    sa.Column('symbol', sa.String(length=20), nullable=False),
+    sa.Column('bar_time', sa.DateTime(), nullable=True),
+    sa.Column('close', sa.Float(), nullable=True),
+    sa.Column('rsi', sa.Float(), nullable=True),
+    sa.Column('macd', sa.Float(), nullable=True),
+    sa.Column('macd_signal', sa.Float(), nullable=True),
+    sa.Column('macd_diff', sa.Float(), nullable=True),
+    sa.Column('ma_20', sa.Float(), nullable=True),
+    sa.Column('ma_50', sa.Float(), nullable=True),
+    sa.Column('ma_200', sa.Float(), nullable=True),
+    sa.Column('bb_high', sa.Float(), nullable=True),
+    sa.Column('bb_low', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('interval', 'symbol')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('indicator_snapshots')
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# backend/shared is copied next to app/ in the image; in a source checkout it
+# lives one level up, beside backend/api
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if os.path.isdir(os.path.join(_BACKEND_DIR, "shared")) and _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
@@ -1,33 +1,40 @@
 from fastapi import APIRouter, Depends
-from typing import List
+from typing import List, Optional
 import yfinance as yf
 from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
+from shared.models.market_data import BarArray, SymbolTable
 from app.dependencies.auth import get_current_user
+from app.dependencies.database import get_db
+from app.models.indicator import IndicatorSnapshot
+from app.schemas.indicator import IndicatorSnapshotList
+from app.services.market_service import MarketService
 
 router = APIRouter()
 
 @router.get("/prices/{symbol}")
 async def get_price(symbol: str, current_user: dict = Depends(get_current_user)):
     """Get current price for a symbol"""
-    try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="1d", interval="1m")
-        
-        if hist.empty:
-            return {"error": f"No data for symbol {symbol}"}
-        
-        latest = hist.iloc[-1]
-        
-        return {
-            "symbol": symbol,
-            "price": float(latest["Close"]),
-            "timestamp": datetime.now().isoformat(),
-            "change": float(latest["Close"] - hist.iloc[-2]["Close"]) if len(hist) > 1 else 0,
-            "change_percent": float(((latest["Close"] - hist.iloc[-2]["Close"]) / hist.iloc[-2]["Close"] * 100)) if len(hist) > 1 else 0
-        }
-    except Exception as e:
-        return {"error": str(e)}
+    # Engine snapshot on this host when fresh, yfinance otherwise
+    quote = MarketService.get_latest_price(symbol)
+    if quote is None:
+        return {"error": f"No data for symbol {symbol}"}
+    return quote
+
+@router.get("/indicators", response_model=IndicatorSnapshotList)
+async def get_indicators(interval: str = "5m", symbols: Optional[str] = None,
+                         current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Latest RSI, MACD, moving averages and Bollinger Bands for every symbol"""
+    # One primary-key range read on (interval, symbol); rows come back as plain mappings
+    table = IndicatorSnapshot.__table__
+    query = select(table).where(table.c.interval == interval)
+    if symbols:
+        query = query.where(table.c.symbol.in_([s.strip().upper() for s in symbols.split(",")]))
+    rows = db.execute(query.order_by(table.c.symbol)).mappings().all()
+    
+    return {"interval": interval, "count": len(rows), "indicators": rows}
 
 @router.get("/history/{symbol}")
 async def get_history(symbol: str, interval: str = "1d", period: str = "1mo", 
@@ -40,17 +47,18 @@ async def get_history(symbol: str, interval: str = "1d", period: str = "1mo",
         if hist.empty:
             return {"error": f"No historical data for {symbol}"}
         
-        # Convert to list of dicts
-        data = []
-        for index, row in hist.iterrows():
-            data.append({
-                "timestamp": index.isoformat(),
-                "open": float(row["Open"]),
-                "high": float(row["High"]),
-                "low": float(row["Low"]),
-                "close": float(row["Close"]),
-                "volume": int(row["Volume"])
-            })
+        # Convert to list of dicts column-wise rather than row by row
+        data = [
+            {
+                "timestamp": bar["timestamp"],
+                "open": bar["open"],
+                "high": bar["high"],
+                "low": bar["low"],
+                "close": bar["close"],
+                "volume": int(bar["volume"])
+            }
+            for bar in BarArray.from_frame(hist, symbol=symbol, symbols=SymbolTable()).to_records()
+        ]
         
         return {
             "symbol": symbol,
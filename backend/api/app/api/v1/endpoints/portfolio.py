@@ -6,6 +6,7 @@ from datetime import datetime
 from app.dependencies.database import get_db
 from app.api.deps import get_current_active_user
 from app.models.user import User
+from app.models.portfolio import PortfolioRiskSnapshot
 from app.schemas.trade import TradeCreate, TradeResponse
 from app.schemas.portfolio import (
     PortfolioResponse,
@@ -13,6 +14,7 @@ from app.schemas.portfolio import (
     HoldingResponse,
     DepositRequest,
     WithdrawRequest,
+    PortfolioRiskResponse,
 )
 from app.core.currency import to_sll, to_usd, EXCHANGE_RATE_USD_SLL
 from app.services.pro_market_service import pro_market_service
@@ -101,6 +103,20 @@ async def get_stats(
         }
 
 
+@router.get("/risk", response_model=PortfolioRiskResponse)
+async def get_portfolio_risk(
+    current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)
+):
+    """Get the latest nightly risk snapshot (volatility, VaR, Sharpe, concentration)"""
+    snapshot = db.get(PortfolioRiskSnapshot, current_user.id)
+    if not snapshot:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No risk snapshot yet. Risk is computed nightly for open positions.",
+        )
+    return snapshot
+
+
 @router.post("/trade", response_model=TradeResponse)
 async def execute_trade(
     trade: TradeCreate,
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime, timedelta
 
+from app.crud.signal import signal as crud_signal
 from app.dependencies.auth import get_current_user
 from app.dependencies.database import get_db
 from sqlalchemy.orm import Session
 
 router = APIRouter()
 
+# Stored signals carry no timeframe; the engine derives them from 5-minute bars
+STORED_SIGNAL_TIMEFRAME = "5M"
+
 
 def make_signals(limit: int = 20):
     """Generate enriched AI trading signals with current timestamps."""
@@ -177,6 +181,27 @@ def make_signals(limit: int = 20):
     return signals[:limit]
 
 
+def risk_label(row: dict) -> str:
+    """Low/Medium/High from the stop-loss distance, else from confidence"""
+    price, stop_loss = row.get("price"), row.get("stop_loss")
+    if price and stop_loss:
+        distance = abs(price - stop_loss) / price
+        return "Low" if distance <= 0.04 else "Medium" if distance <= 0.125 else "High"
+    confidence = row.get("confidence") or 0
+    return "Low" if confidence >= 80 else "Medium" if confidence >= 65 else "High"
+
+
+def to_dashboard_signal(row: dict) -> dict:
+    """A stored signal row in the shape the dashboard widgets render"""
+    return {
+        **row,
+        "pair": row["symbol"],
+        "timeframe": STORED_SIGNAL_TIMEFRAME,
+        "risk": risk_label(row),
+        "entry": row.get("price"),
+    }
+
+
 @router.get("/")
 async def get_signals(
     limit: Optional[int] = 10,
@@ -199,13 +224,41 @@ async def get_signals(
 
 @router.get("/recent")
 async def get_recent_signals(
-    limit: Optional[int] = 5,
+    limit: int = Query(5, ge=1, le=50),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Get most recent signals for dashboard widget"""
-    signals = make_signals(limit=limit)
-    return signals
+    rows, _ = crud_signal.get_recent_rows(db, limit=limit)
+    if not rows:
+        # Demo signals until the engine has stored any
+        return make_signals(limit=limit)
+    return [to_dashboard_signal(row) for row in rows]
+
+
+@router.get("/feed")
+async def get_signal_feed(
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    symbol: Optional[str] = None,
+    action: Optional[str] = None,
+    active_only: bool = False,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Stored signals, newest first, paged with an opaque cursor"""
+    try:
+        signals, next_cursor = crud_signal.get_recent_rows(
+            db,
+            limit=limit,
+            cursor=cursor,
+            symbol=symbol.upper() if symbol else None,
+            action=action.upper() if action else None,
+            active_only=active_only,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"count": len(signals), "signals": signals, "next_cursor": next_cursor}
 
 
 @router.get("/{signal_id}")
@@ -2,7 +2,8 @@ from fastapi import WebSocket, WebSocketDisconnect
 import asyncio
 import json
 from datetime import datetime
-import yfinance as yf
+
+from app.services.market_service import MarketService
 
 class MarketStream:
     """WebSocket stream for real-time market data"""
@@ -42,17 +43,15 @@ class MarketStream:
                 market_data = []
                 for symbol in self.symbols:
                     try:
-                        ticker = yf.Ticker(symbol)
-                        hist = ticker.history(period="1d", interval="1m")
-                        
-                        if not hist.empty:
-                            latest = hist.iloc[-1]
+                        # Engine snapshot when fresh, yfinance otherwise
+                        quote = MarketService.get_latest_price(symbol)
+                        if quote is not None:
                             market_data.append({
                                 "symbol": symbol,
-                                "price": float(latest["Close"]),
-                                "change": float(latest["Close"] - hist.iloc[-2]["Close"]) if len(hist) > 1 else 0,
-                                "volume": int(latest["Volume"]),
-                                "timestamp": datetime.now().isoformat()
+                                "price": quote["price"],
+                                "change": quote["change"],
+                                "volume": quote["volume"],
+                                "timestamp": quote["timestamp"]
                             })
                     except Exception as e:
                         print(f"Error getting {symbol}: {e}")
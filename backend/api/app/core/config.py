@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -37,6 +37,10 @@ class Settings(BaseSettings):
     # AI Engine
     AI_ENGINE_URL: str = "http://localhost:8001"
 
+    # Latest bars the AI engine publishes on this host (None = its tmpfs default)
+    MARKET_SNAPSHOT_PATH: Optional[str] = None
+    MARKET_SNAPSHOT_MAX_AGE: int = 900  # seconds before falling back to yfinance
+
     class Config:
         env_file = ".env"
 
@@ -1,12 +1,45 @@
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
+import base64
 
 from app.models.signal import Signal
 from app.schemas.signal import SignalCreate, SignalFilter
 from .base import CRUDBase
 
 
+# Columns a signal feed needs; read as plain rows, no ORM objects
+FEED_COLUMNS = (
+    Signal.id,
+    Signal.symbol,
+    Signal.action,
+    Signal.confidence,
+    Signal.strategy,
+    Signal.reason,
+    Signal.price,
+    Signal.target_price,
+    Signal.stop_loss,
+    Signal.is_active,
+    Signal.created_at.label("timestamp"),
+)
+
+
+def encode_cursor(timestamp: datetime, signal_id: int) -> str:
+    """Opaque page cursor for the (created_at, id) of the last row returned"""
+    raw = f"{timestamp.isoformat()}|{signal_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError on anything malformed"""
+    try:
+        timestamp, signal_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(signal_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
 class CRUDSignal(CRUDBase[Signal, SignalCreate, SignalCreate]):
     def get_by_symbol(
         self, db: Session, *, symbol: str, skip: int = 0, limit: int = 100
@@ -32,6 +65,40 @@ class CRUDSignal(CRUDBase[Signal, SignalCreate, SignalCreate]):
             .all()
         )
 
+    def get_recent_rows(
+        self,
+        db: Session,
+        *,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        symbol: Optional[str] = None,
+        action: Optional[str] = None,
+        active_only: bool = False,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Newest signals as dicts plus the cursor for the next page
+
+        Keyset pagination on (created_at, id): every page is an index range
+        scan, however far back the caller has scrolled.
+        """
+        query = select(*FEED_COLUMNS)
+        if symbol:
+            query = query.where(Signal.symbol == symbol)
+        if action:
+            query = query.where(Signal.action == action)
+        if active_only:
+            query = query.where(Signal.is_active == True)
+        if cursor:
+            query = query.where(
+                tuple_(Signal.created_at, Signal.id) < tuple_(*decode_cursor(cursor))
+            )
+        query = query.order_by(Signal.created_at.desc(), Signal.id.desc()).limit(limit)
+
+        rows = [dict(row) for row in db.execute(query).mappings()]
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+        return rows, next_cursor
+
     def filter_signals(
         self, db: Session, *, filter: SignalFilter, skip: int = 0, limit: int = 100
     ) -> List[Signal]:
@@ -2,6 +2,7 @@
 # imported by Alembic
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
-from app.models.portfolio import Portfolio, Position, Trade  # noqa
+from app.models.portfolio import Portfolio, Position, Trade, PortfolioRiskSnapshot  # noqa
 from app.models.signal import Signal  # noqa
+from app.models.indicator import IndicatorSnapshot  # noqa
 from app.models.subscription import Subscription  # noqa
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Float, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+
+class IndicatorSnapshot(Base):
+    """Latest indicator values per symbol, upserted by the AI engine each cycle"""
+
+    __tablename__ = "indicator_snapshots"
+
+    # interval leads the key so a universe-wide read is one index range scan
+    interval = Column(String(10), primary_key=True)
+    symbol = Column(String(20), primary_key=True)
+
+    bar_time = Column(DateTime)  # open of the bar the values are for, UTC
+    close = Column(Float)
+
+    rsi = Column(Float)
+    macd = Column(Float)
+    macd_signal = Column(Float)
+    macd_diff = Column(Float)
+    ma_20 = Column(Float)
+    ma_50 = Column(Float)
+    ma_200 = Column(Float)
+    bb_high = Column(Float)
+    bb_low = Column(Float)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
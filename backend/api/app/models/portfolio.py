@@ -98,3 +98,24 @@ class Trade(Base):
 
     # Relationships
     portfolio = relationship("Portfolio", back_populates="trades")
+
+
+class PortfolioRiskSnapshot(Base):
+    """Per-user risk metrics written nightly by the AI engine's risk batch"""
+
+    __tablename__ = "portfolio_risk_snapshots"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    total_value = Column(Float, nullable=False)
+    position_count = Column(Integer, nullable=False)
+
+    # Risk metrics (annualized volatility/Sharpe, 1-period historical VaR)
+    volatility = Column(Float)
+    var_95 = Column(Float)
+    var_99 = Column(Float)
+    sharpe_ratio = Column(Float)
+    concentration = Column(Float)  # Herfindahl index of position weights
+    max_weight = Column(Float)
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Index
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
@@ -28,3 +28,6 @@ class Signal(Base):
 
     # Relationship to user who received the signal
     user_id = Column(Integer, index=True)
+
+    # Newest-first keyset pagination walks this index
+    __table_args__ = (Index("ix_signals_created_at_id", "created_at", "id"),)
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+
+class IndicatorSnapshotResponse(BaseModel):
+    symbol: str
+    interval: str
+    bar_time: Optional[datetime] = None
+    close: Optional[float] = None
+    rsi: Optional[float] = None
+    macd: Optional[float] = None
+    macd_signal: Optional[float] = None
+    macd_diff: Optional[float] = None
+    ma_20: Optional[float] = None
+    ma_50: Optional[float] = None
+    ma_200: Optional[float] = None
+    bb_high: Optional[float] = None
+    bb_low: Optional[float] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class IndicatorSnapshotList(BaseModel):
+    interval: str
+    count: int
+    indicators: List[IndicatorSnapshotResponse]
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import List, Optional
 
 
@@ -82,3 +83,19 @@ class PortfolioSummary(BaseModel):
     total_pnl: float
     daily_pnl: float
     position_count: int
+
+
+class PortfolioRiskResponse(BaseModel):
+    user_id: int
+    total_value: float
+    position_count: int
+    volatility: Optional[float] = None
+    var_95: Optional[float] = None
+    var_99: Optional[float] = None
+    sharpe_ratio: Optional[float] = None
+    concentration: Optional[float] = None
+    max_weight: Optional[float] = None
+    computed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
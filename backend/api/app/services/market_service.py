@@ -1,14 +1,69 @@
 import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 import requests
 
+from app.core.config import settings
+from shared.models.market_data import BarArray, SymbolTable
+from shared.models.market_snapshot import MarketSnapshot
+
+_snapshot = None
+
+def _market_snapshot() -> Optional[MarketSnapshot]:
+    """The engine's snapshot file, opened once it exists"""
+    global _snapshot
+    if _snapshot is not None and _snapshot.is_replaced():
+        _snapshot = None  # engine restarted with a new layout
+    if _snapshot is None:
+        try:
+            _snapshot = MarketSnapshot(settings.MARKET_SNAPSHOT_PATH)
+        except (OSError, ValueError):
+            return None  # engine not running on this host (yet)
+    return _snapshot
+
 class MarketService:
     """Service for market data operations"""
     
+    @staticmethod
+    def get_snapshot(symbol: str) -> Optional[Dict[str, Any]]:
+        """Latest bar and indicators the AI engine published, if fresh"""
+        snapshot = _market_snapshot()
+        if snapshot is None:
+            return None
+        try:
+            return snapshot.get(symbol, max_age=settings.MARKET_SNAPSHOT_MAX_AGE)
+        except TimeoutError:
+            return None
+    
+    @staticmethod
+    def _quote(symbol: str, latest: Dict[str, Any], previous_close: Optional[float], timestamp: str) -> Dict[str, Any]:
+        """Price payload shared by the snapshot and yfinance paths"""
+        close = latest["close"]
+        volume = latest["volume"]
+        if previous_close is None or previous_close != previous_close:  # missing or NaN
+            previous_close = close
+        return {
+            "symbol": symbol,
+            "price": close,
+            "open": latest["open"],
+            "high": latest["high"],
+            "low": latest["low"],
+            "volume": int(volume) if volume is not None and volume == volume else 0,
+            "change": close - previous_close,
+            "change_percent": ((close - previous_close) / previous_close) * 100 if previous_close else 0,
+            "timestamp": timestamp
+        }
+    
     @staticmethod
     def get_latest_price(symbol: str) -> Optional[Dict[str, Any]]:
         """Get latest price for a symbol"""
+        # Same-host engine snapshot first: no network I/O, no recomputation.
+        # yfinance only when it is missing, stale or has no close.
+        latest = MarketService.get_snapshot(symbol)
+        if latest is not None and latest["close"] is not None:
+            timestamp = datetime.fromtimestamp(latest["timestamp"] / 1e9, tz=timezone.utc).isoformat()
+            return MarketService._quote(symbol, latest, latest["prev_close"], timestamp)
+        
         try:
             ticker = yf.Ticker(symbol)
             hist = ticker.history(period="1d", interval="1m")
@@ -16,20 +71,11 @@ class MarketService:
             if hist.empty:
                 return None
             
-            latest = hist.iloc[-1]
-            previous = hist.iloc[-2] if len(hist) > 1 else latest
-            
-            return {
-                "symbol": symbol,
-                "price": float(latest["Close"]),
-                "open": float(latest["Open"]),
-                "high": float(latest["High"]),
-                "low": float(latest["Low"]),
-                "volume": int(latest["Volume"]),
-                "change": float(latest["Close"] - previous["Close"]),
-                "change_percent": float(((latest["Close"] - previous["Close"]) / previous["Close"]) * 100) if previous["Close"] != 0 else 0,
-                "timestamp": datetime.now().isoformat()
-            }
+            # Request-scoped table: arbitrary user symbols never reach the process-wide one
+            bars = BarArray.from_frame(hist, symbol=symbol, symbols=SymbolTable())
+            latest = bars.bar(-1)
+            previous = bars.bar(-2) if len(bars) > 1 else latest
+            return MarketService._quote(symbol, latest, previous["close"], datetime.now().isoformat())
         except Exception as e:
             print(f"Error getting price for {symbol}: {e}")
             return None
@@ -0,0 +1,292 @@
+"""Compact struct-of-arrays container for OHLCV bars shared by the engine and the API."""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+FRAME_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+
+class SymbolTable:
+    """Interns symbol strings to small integer IDs.
+
+    IDs are never reused, so a table only grows; `max_size` caps it and
+    intern() raises ValueError once it is full.
+    """
+
+    def __init__(self, names: Sequence[str] = (), max_size: Optional[int] = None):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.max_size = max_size
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name: str) -> int:
+        """ID for a symbol, assigning a new one on first sight."""
+        symbol_id = self._ids.get(name)
+        if symbol_id is None:
+            if self.max_size is not None and len(self.names) >= self.max_size:
+                raise ValueError(f"Symbol table is full ({self.max_size} symbols)")
+            symbol_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol_id
+
+    def intern_many(self, names) -> np.ndarray:
+        """IDs for an array of symbols; strings are hashed once per distinct value."""
+        unique, inverse = np.unique(np.asarray(names).astype(str), return_inverse=True)
+        lookup = np.array([self.intern(name) for name in unique.tolist()], dtype=np.int32)
+        return lookup[inverse.reshape(-1)]
+
+    def id_of(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def name_of(self, symbol_id: int) -> str:
+        return self.names[symbol_id]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+# Process-wide table so IDs agree between every array built in one process.
+# Only the engine's own universe belongs here; arrays built for arbitrary
+# request symbols should use a throwaway SymbolTable instead.
+DEFAULT_MAX_SYMBOLS = 10000
+default_symbols = SymbolTable(max_size=DEFAULT_MAX_SYMBOLS)
+
+
+class BarArray:
+    """OHLCV bars as one contiguous array per field.
+
+    Timestamps are int64 nanoseconds since the epoch (UTC), prices and volume
+    share one float dtype, and symbols are int32 IDs into a SymbolTable.
+    Slicing returns views; nothing is copied until a caller asks for it.
+    """
+
+    __slots__ = ("timestamps", "symbol_ids", "open", "high", "low", "close", "volume", "symbols")
+
+    def __init__(
+        self,
+        timestamps,
+        symbol_ids,
+        open,
+        high,
+        low,
+        close,
+        volume,
+        symbols: SymbolTable = None,
+        dtype=None,
+    ):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.symbol_ids = np.asarray(symbol_ids, dtype=np.int32)
+        dtype = dtype or np.result_type(np.asarray(close).dtype, np.float32)
+        self.open = np.asarray(open, dtype=dtype)
+        self.high = np.asarray(high, dtype=dtype)
+        self.low = np.asarray(low, dtype=dtype)
+        self.close = np.asarray(close, dtype=dtype)
+        self.volume = np.asarray(volume, dtype=dtype)
+        self.symbols = symbols if symbols is not None else default_symbols
+
+        n = len(self.timestamps)
+        for field in ("symbol_ids",) + PRICE_FIELDS:
+            if len(getattr(self, field)) != n:
+                raise ValueError(f"BarArray field '{field}' has length {len(getattr(self, field))}, expected {n}")
+
+    # --- construction -------------------------------------------------------
+
+    @classmethod
+    def empty(cls, dtype=np.float64, symbols: SymbolTable = None) -> "BarArray":
+        zeros = np.empty(0, dtype=dtype)
+        return cls(np.empty(0, np.int64), np.empty(0, np.int32), zeros, zeros, zeros, zeros, zeros, symbols, dtype)
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        symbol: str = None,
+        symbol_col: str = "symbol",
+        time_col: str = None,
+        dtype=np.float64,
+        symbols: SymbolTable = None,
+    ) -> "BarArray":
+        """Build from an OHLCV DataFrame (yfinance column names).
+
+        Timestamps come from the DatetimeIndex unless time_col is given; naive
+        times are taken as UTC. A single `symbol` applies to every row,
+        otherwise `symbol_col` is interned.
+        """
+        symbols = symbols if symbols is not None else default_symbols
+        if df.empty:
+            return cls.empty(dtype, symbols)
+
+        times = df[time_col] if time_col else df.index
+        timestamps = cls._to_epoch_ns(times)
+
+        if symbol is not None:
+            symbol_ids = np.full(len(df), symbols.intern(symbol), dtype=np.int32)
+        elif symbol_col in df.columns:
+            symbol_ids = symbols.intern_many(df[symbol_col].to_numpy())
+        else:
+            raise ValueError(f"No symbol given and no '{symbol_col}' column")
+
+        fields = {
+            field: (df[column].to_numpy(dtype=dtype) if column in df.columns else np.zeros(len(df), dtype))
+            for field, column in FRAME_COLUMNS.items()
+        }
+        return cls(timestamps, symbol_ids, symbols=symbols, dtype=dtype, **fields)
+
+    @staticmethod
+    def _to_epoch_ns(times) -> np.ndarray:
+        index = pd.DatetimeIndex(times)
+        index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+        return index.as_unit("ns").asi8
+
+    @classmethod
+    def concat(cls, parts: Sequence["BarArray"]) -> "BarArray":
+        """Join arrays built against the same SymbolTable."""
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+        symbols = parts[0].symbols
+        if any(part.symbols is not symbols for part in parts):
+            raise ValueError("Cannot concatenate BarArrays with different symbol tables")
+        return cls(
+            np.concatenate([p.timestamps for p in parts]),
+            np.concatenate([p.symbol_ids for p in parts]),
+            symbols=symbols,
+            **{field: np.concatenate([getattr(p, field) for p in parts]) for field in PRICE_FIELDS},
+        )
+
+    # --- access -------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, key) -> "BarArray":
+        """Slices are zero-copy views; index arrays and masks copy like numpy."""
+        if isinstance(key, (int, np.integer)):
+            key = slice(key, key + 1 or None)
+        return BarArray(
+            self.timestamps[key],
+            self.symbol_ids[key],
+            symbols=self.symbols,
+            **{field: getattr(self, field)[key] for field in PRICE_FIELDS},
+        )
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.close.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, field).nbytes for field in ("timestamps", "symbol_ids") + PRICE_FIELDS)
+
+    def astype(self, dtype) -> "BarArray":
+        """Copy with prices and volume in another float dtype."""
+        return BarArray(
+            self.timestamps,
+            self.symbol_ids,
+            symbols=self.symbols,
+            dtype=dtype,
+            **{field: getattr(self, field) for field in PRICE_FIELDS},
+        )
+
+    def symbol_names(self) -> np.ndarray:
+        """Symbol string for every bar (materialized on demand)."""
+        return np.asarray(self.symbols.names, dtype=object)[self.symbol_ids]
+
+    def for_symbol(self, symbol: str) -> "BarArray":
+        """Bars of one symbol; a view when the symbol's rows are contiguous."""
+        symbol_id = self.symbols.id_of(symbol)
+        if symbol_id is None:
+            return self[0:0]
+        rows = np.flatnonzero(self.symbol_ids == symbol_id)
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+            return self[rows[0] : rows[-1] + 1]
+        return self[rows]
+
+    def sort_by_symbol(self) -> "BarArray":
+        """Copy ordered by (symbol, timestamp) so per-symbol access is zero-copy."""
+        order = np.lexsort((self.timestamps, self.symbol_ids))
+        return self[order]
+
+    def symbol_slices(self) -> Iterator[Tuple[str, "BarArray"]]:
+        """(symbol, view) pairs over runs of equal symbol IDs, in row order."""
+        if not len(self):
+            return
+        starts = np.flatnonzero(np.diff(self.symbol_ids)) + 1
+        bounds = np.concatenate(([0], starts, [len(self)]))
+        for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            yield self.symbols.name_of(int(self.symbol_ids[start])), self[start:stop]
+
+    def last_per_symbol(self) -> "BarArray":
+        """The last bar (in row order) of every symbol."""
+        if not len(self):
+            return self
+        _, reverse_first = np.unique(self.symbol_ids[::-1], return_index=True)
+        rows = np.sort(len(self) - 1 - reverse_first)
+        return self[rows]
+
+    def resample(self, interval) -> "BarArray":
+        """Aggregate into coarser bars aligned to multiples of `interval` since the epoch.
+
+        Open is the first bar's, close the last's, high/low the extremes and
+        volume the sum. Output is ordered by (symbol, bucket start).
+        """
+        interval_ns = pd.Timedelta(interval).value
+        if not len(self):
+            return self
+        ordered = self.sort_by_symbol()
+        buckets = ordered.timestamps - ordered.timestamps % interval_ns
+        starts = np.flatnonzero(
+            np.concatenate(([True], (np.diff(ordered.symbol_ids) != 0) | (np.diff(buckets) != 0)))
+        )
+        ends = np.concatenate((starts[1:], [len(ordered)])) - 1
+        return BarArray(
+            buckets[starts],
+            ordered.symbol_ids[starts],
+            ordered.open[starts],
+            np.maximum.reduceat(ordered.high, starts),
+            np.minimum.reduceat(ordered.low, starts),
+            ordered.close[ends],
+            np.add.reduceat(ordered.volume, starts),
+            symbols=self.symbols,
+            dtype=self.dtype,
+        )
+
+    def bar(self, i: int) -> dict:
+        """One bar as a plain dict."""
+        return {
+            "symbol": self.symbols.name_of(int(self.symbol_ids[i])),
+            "timestamp": pd.Timestamp(int(self.timestamps[i]), tz="UTC").isoformat(),
+            **{field: float(getattr(self, field)[i]) for field in PRICE_FIELDS},
+        }
+
+    def to_records(self) -> List[dict]:
+        """All bars as dicts, converting each column once instead of per row."""
+        names = self.symbol_names().tolist()
+        times = pd.to_datetime(self.timestamps, unit="ns", utc=True)
+        columns = [getattr(self, field).tolist() for field in PRICE_FIELDS]
+        return [
+            {"symbol": name, "timestamp": ts.isoformat(), **dict(zip(PRICE_FIELDS, values))}
+            for name, ts, *values in zip(names, times, *columns)
+        ]
+
+    def to_frame(self, categorical_symbols: bool = True) -> pd.DataFrame:
+        """yfinance-style DataFrame (UTC DatetimeIndex, Open..Volume, symbol).
+
+        The symbol column is categorical over the symbol table, so it holds
+        the int32 codes rather than one string object per row.
+        """
+        index = pd.DatetimeIndex(pd.to_datetime(self.timestamps, unit="ns", utc=True))
+        if categorical_symbols:
+            symbol = pd.Categorical.from_codes(self.symbol_ids, categories=list(self.symbols.names))
+        else:
+            symbol = self.symbol_names()
+        data = {column: getattr(self, field) for field, column in FRAME_COLUMNS.items()}
+        data["symbol"] = symbol
+        return pd.DataFrame(data, index=index, copy=False)
+
+    def __repr__(self) -> str:
+        return f"BarArray(bars={len(self)}, symbols={len(np.unique(self.symbol_ids))}, dtype={self.dtype})"
@@ -0,0 +1,200 @@
+"""Latest bar and indicator values per symbol in a memory-mapped file.
+
+The AI engine writes, API workers on the same host read. Every slot carries
+a sequence counter (a seqlock): the writer makes it odd before touching the
+slot and even again afterwards, and a reader retries any slot whose counter
+was odd or moved while it copied. Readers never block the writer and never
+see a half-written record.
+"""
+
+import mmap
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .market_data import BarArray
+
+MAGIC = b"LSNP"
+VERSION = 1
+HEADER = np.dtype([("magic", "S4"), ("version", "<u4"), ("slots", "<u4"), ("count", "<u4")])
+HEADER_SIZE = 64
+
+INDICATOR_FIELDS = ("rsi", "macd", "macd_signal", "macd_diff", "ma_20", "ma_50", "ma_200", "bb_high", "bb_low")
+BAR_FIELDS = ("open", "high", "low", "close", "volume", "prev_close")
+
+RECORD = np.dtype(
+    [("seq", "<u8"), ("symbol", "S24"), ("timestamp", "<i8"), ("published", "<i8")]
+    + [(field, "<f8") for field in BAR_FIELDS + INDICATOR_FIELDS]
+)
+
+
+def default_snapshot_path() -> str:
+    """tmpfs when the host has one, so the pages never touch disk."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "leoneai-market.snap")
+
+
+class MarketSnapshot:
+    """Fixed-slot latest-value board shared between processes.
+
+    One process (the engine) opens it with `writer=True` and calls publish();
+    any number of readers call get() / get_all(). Slots are assigned on first
+    publish of a symbol and never move, so readers can cache the position.
+    """
+
+    def __init__(self, path: str = None, slots: int = 256, writer: bool = False):
+        self.path = path or default_snapshot_path()
+        self.writer = writer
+        self._slot_of: Dict[str, int] = {}
+
+        if writer:
+            size = HEADER_SIZE + slots * RECORD.itemsize
+            if not os.path.exists(self.path) or os.path.getsize(self.path) != size:
+                # Never resize in place: readers still mapping the old file would fault
+                staging = f"{self.path}.{os.getpid()}.tmp"
+                with open(staging, "wb") as f:
+                    f.truncate(size)
+                os.replace(staging, self.path)
+            with open(self.path, "r+b") as f:
+                self._mm = mmap.mmap(f.fileno(), size)
+                self._inode = os.fstat(f.fileno()).st_ino
+            header = np.frombuffer(self._mm, dtype=HEADER, count=1)
+            if header["magic"][0] != MAGIC or header["slots"][0] != slots:
+                header[0] = (MAGIC, VERSION, slots, 0)
+        else:
+            # Raises FileNotFoundError until the engine has created the file
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._inode = os.fstat(f.fileno()).st_ino
+            header = np.frombuffer(self._mm, dtype=HEADER, count=1)
+            if header["magic"][0] != MAGIC or header["version"][0] != VERSION:
+                raise ValueError(f"{self.path} is not a market snapshot file")
+
+        self._header = header
+        self.slots = int(header["slots"][0])
+        self._records = np.frombuffer(self._mm, dtype=RECORD, count=self.slots, offset=HEADER_SIZE)
+
+        # A writer restarting over an existing file keeps its slot layout
+        for slot in range(int(header["count"][0])):
+            self._slot_of[self._records["symbol"][slot].decode()] = slot
+        if writer:
+            # A writer that died mid-publish leaves odd counters; the next publish overwrites those slots
+            self._records["seq"] += self._records["seq"] % 2
+
+    # --- writer -------------------------------------------------------------
+
+    def _slot(self, symbol: str) -> int:
+        slot = self._slot_of.get(symbol)
+        if slot is None:
+            if len(self._slot_of) >= self.slots:
+                raise ValueError(f"Market snapshot is full ({self.slots} symbols)")
+            slot = self._slot_of[symbol] = len(self._slot_of)
+        return slot
+
+    def publish(self, bars: BarArray, indicators: Optional[Dict[str, dict]] = None) -> int:
+        """Write the last bar of every symbol in `bars`, plus its indicators.
+
+        `indicators` maps symbol -> {field: value} for INDICATOR_FIELDS;
+        missing values are stored as NaN. Returns the number of slots written.
+        """
+        if not self.writer:
+            raise RuntimeError("Market snapshot opened read-only")
+        if not len(bars):
+            return 0
+        indicators = indicators or {}
+        now = time.time_ns()
+
+        latest = bars.last_per_symbol()
+        written = 0
+        for i in range(len(latest)):
+            symbol = latest.symbols.name_of(int(latest.symbol_ids[i]))
+            history = bars.for_symbol(symbol)
+            prev_close = history.close[-2] if len(history) > 1 else history.close[-1]
+            values = indicators.get(symbol, {})
+
+            record = self._records[self._slot(symbol)]
+            record["seq"] += 1  # odd: write in progress
+            record["symbol"] = symbol.encode()[:24]
+            record["timestamp"] = latest.timestamps[i]
+            record["published"] = now
+            for field in BAR_FIELDS[:-1]:
+                record[field] = getattr(latest, field)[i]
+            record["prev_close"] = prev_close
+            for field in INDICATOR_FIELDS:
+                value = values.get(field)
+                record[field] = np.nan if value is None else value
+            record["seq"] += 1  # even: consistent again
+            written += 1
+
+        # Readers only look at slots below count, so grow it last
+        self._header["count"] = max(int(self._header["count"][0]), len(self._slot_of))
+        return written
+
+    # --- reader -------------------------------------------------------------
+
+    def _read(self, slots: np.ndarray, retries: int = 100) -> np.ndarray:
+        """Consistent copies of the given slots."""
+        result = np.empty(len(slots), dtype=RECORD)
+        pending = np.arange(len(slots))
+        for _ in range(retries):
+            before = self._records["seq"][slots[pending]]
+            copy = self._records[slots[pending]]  # fancy indexing copies
+            after = self._records["seq"][slots[pending]]
+            ok = (before == after) & (before % 2 == 0)
+            result[pending[ok]] = copy[ok]
+            pending = pending[~ok]
+            if not len(pending):
+                return result
+            time.sleep(0)
+        raise TimeoutError(f"Market snapshot slots kept changing: {slots[pending].tolist()}")
+
+    @staticmethod
+    def _to_dict(record) -> dict:
+        data = {
+            "symbol": record["symbol"].decode(),
+            "timestamp": int(record["timestamp"]),
+            "published": int(record["published"]),
+        }
+        for field in BAR_FIELDS + INDICATOR_FIELDS:
+            value = float(record[field])
+            data[field] = None if np.isnan(value) else value
+        return data
+
+    def get(self, symbol: str, max_age: float = None) -> Optional[dict]:
+        """Latest values for a symbol, or None if unknown or older than max_age seconds."""
+        slot = self._slot_of.get(symbol)
+        if slot is None:
+            count = int(self._header["count"][0])
+            names = self._records["symbol"][:count]
+            matches = np.flatnonzero(names == symbol.encode())
+            if not len(matches):
+                return None
+            slot = self._slot_of[symbol] = int(matches[0])
+
+        record = self._read(np.array([slot]))[0]
+        if max_age is not None and time.time_ns() - record["published"] > max_age * 1e9:
+            return None
+        return self._to_dict(record)
+
+    def get_all(self, max_age: float = None) -> Dict[str, dict]:
+        """Every published symbol, read in one vectorized pass."""
+        count = int(self._header["count"][0])
+        records = self._read(np.arange(count))
+        if max_age is not None:
+            records = records[time.time_ns() - records["published"] <= max_age * 1e9]
+        return {record["symbol"].decode(): self._to_dict(record) for record in records}
+
+    def is_replaced(self) -> bool:
+        """True once the writer has swapped in a new file; reopen to follow it."""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return False
+
+    def close(self):
+        self._records = None
+        self._header = None
+        self._mm.close()